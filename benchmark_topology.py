@@ -0,0 +1,167 @@
+"""
+Benchmark CPU topologies of RapidOCR to pick the fastest one for a node.
+
+RapidOCR is run once per combination of process count, ONNX Runtime intra-op and
+inter-op threads, graph optimization level, execution mode and CPU memory arena,
+each combination as its own run named <bench_name>_<topology>. Frames/sec, p95
+latency and CER of every run are tabulated in evaluation_summary/<bench_name>_topology.json
+and .csv, and the topology with the highest throughput and the one with the lowest
+p95 latency are marked. Combinations running more threads than there are cores are
+skipped unless --allow_oversubscription is given.
+
+Run it on the local frame set, so downloads do not blur the numbers, e.g.
+    python benchmark_topology.py --dataset local:ocr_dataset.pack --num_vids 5 --workers_list 1 2 4 --intra_op_threads_list 1 2 4
+"""
+
+import argparse
+import itertools
+import os
+from datetime import datetime
+
+import run
+from models import EXECUTION_MODES, GRAPH_OPTIMIZATION_LEVELS
+from utils import run_sweep, write_sweep_report
+
+
+TOPOLOGY_COLUMNS = (
+    "topology",
+    "run",
+    "workers",
+    "intra_op_threads",
+    "inter_op_threads",
+    "graph_optimization",
+    "execution_mode",
+    "cpu_mem_arena",
+    "frames_per_sec",
+    "avg_processing_time",
+    "p95_processing_time",
+    "warmup_time",
+    "avg_cer",
+    "best_throughput",
+    "best_p95",
+)
+
+
+def get_args_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser("Benchmark RapidOCR CPU topologies", add_help=False)
+    parser.add_argument("--workers_list", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--intra_op_threads_list", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--inter_op_threads_list", nargs="+", type=int, default=[1])
+    parser.add_argument(
+        "--graph_optimizations",
+        nargs="+",
+        choices=list(GRAPH_OPTIMIZATION_LEVELS),
+        default=["all"],
+    )
+    parser.add_argument(
+        "--execution_modes",
+        nargs="+",
+        choices=list(EXECUTION_MODES),
+        default=["sequential"],
+    )
+    parser.add_argument(
+        "--cpu_mem_arenas",
+        nargs="+",
+        choices=["on", "off"],
+        default=["off"],
+    )
+    parser.add_argument(
+        "--bench_name",
+        default=f"topology_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}",
+        type=str,
+    )
+    parser.add_argument(
+        "--allow_oversubscription",
+        action="store_true",
+        help="Also run combinations whose workers x intra-op threads exceed the core count",
+    )
+    return parser
+
+
+def topologies(args) -> list:
+    cpu_count = os.cpu_count() or 1
+    combinations = []
+    for workers, intra, inter, optimization, mode, arena in itertools.product(
+        args.workers_list,
+        args.intra_op_threads_list,
+        args.inter_op_threads_list,
+        args.graph_optimizations,
+        args.execution_modes,
+        args.cpu_mem_arenas,
+    ):
+        if workers * intra > cpu_count and not args.allow_oversubscription:
+            print(f"Skipping {workers} workers x {intra} intra-op threads on {cpu_count} cores")
+            continue
+        combinations.append(
+            {
+                "workers": workers,
+                "intra_op_threads": intra,
+                "inter_op_threads": inter,
+                "graph_optimization": optimization,
+                "execution_mode": mode,
+                "cpu_mem_arena": arena,
+            }
+        )
+    return combinations
+
+
+def topology_name(topology: dict) -> str:
+    return (
+        f"w{topology['workers']}-intra{topology['intra_op_threads']}-inter{topology['inter_op_threads']}"
+        f"-{topology['graph_optimization']}-{topology['execution_mode']}-arena{topology['cpu_mem_arena']}"
+    )
+
+
+def mark_best(rows: list) -> None:
+    if not rows:
+        return
+    max(rows, key=lambda row: row["frames_per_sec"])["best_throughput"] = True
+    min(rows, key=lambda row: row["p95_processing_time"])["best_p95"] = True
+
+
+def main(args):
+    variants = []
+    for topology in topologies(args):
+        name = topology_name(topology)
+        overrides = {
+            "model": ["rapidocr"],
+            "workers": topology["workers"],
+            "ort_intra_op_threads": topology["intra_op_threads"],
+            "ort_inter_op_threads": topology["inter_op_threads"],
+            "ort_graph_optimization": topology["graph_optimization"],
+            "ort_execution_mode": topology["execution_mode"],
+            "ort_cpu_mem_arena": topology["cpu_mem_arena"],
+            # every topology describes every frame itself
+            "cache_mode": "off",
+            "dedup_threshold": None,
+        }
+        fields = {**topology, "topology": name, "best_throughput": False, "best_p95": False}
+        variants.append((f"{args.bench_name}_{name}", overrides, fields))
+
+    rows = run_sweep(run.main, args, variants, TOPOLOGY_COLUMNS)
+    mark_best(rows)
+    rows.sort(key=lambda row: row["frames_per_sec"], reverse=True)
+    bench_file = write_sweep_report(rows, f"{args.bench_name}_topology", TOPOLOGY_COLUMNS)
+
+    for row in rows:
+        marks = [
+            label
+            for label, marked in (("best throughput", row["best_throughput"]), ("best p95", row["best_p95"]))
+            if marked
+        ]
+        print(
+            f"{row['topology']:<48} {row['frames_per_sec']:>7.2f} frames/s "
+            f"p95={row['p95_processing_time']:.3f}s cer={row['avg_cer']:.4f}"
+            f"{'  <- ' + ', '.join(marks) if marks else ''}"
+        )
+    print(f"Topology benchmark written to {bench_file}.json and {bench_file}.csv")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Benchmark RapidOCR CPU topologies",
+        parents=[run.get_args_parser(), get_args_parser()],
+    )
+    args = parser.parse_args()
+
+    main(args)
@@ -49,3 +49,68 @@ OCR_EVALUATION_DIR = "ocr_evaluation/CV_evaluation"
 
 # Path to the ground truth text directory
 OCR_GROUND_TRUTH_DIR = "ocr_ground_truths"
+
+# On-disk frame cache shared by all models and runs
+FRAME_CACHE_DIR = "frame_cache"
+FRAME_CACHE_MAX_BYTES = 5 * 1024**3
+# In-memory layer shared by the models running side by side with --pipeline
+FRAME_MEMORY_CACHE_MAX_BYTES = 2 * 1024**3
+
+# Maximum number of concurrent requests per provider when running with --async_requests
+MAX_IN_FLIGHT = {
+    "openai": 8,
+    "anthropic": 4,
+    "google": 4,
+    "moondream": 4,
+}
+
+# Frame downloads: timeout in seconds, retries on connection errors and 429/5xx responses,
+# keep-alive connections kept open, and frames downloaded ahead of the one being inferred
+HTTP_TIMEOUT = 30
+HTTP_RETRIES = 3
+HTTP_POOL_SIZE = 16
+PREFETCH_FRAMES = 4
+
+# Incremental OCR of the local engines (--incremental_ocr): side of the tiles frames are compared by,
+# grayscale difference a pixel must exceed to count as changed, share of the frame above which the
+# whole frame is read instead, and frames after which the whole frame is read again regardless
+INCREMENTAL_TILE_SIZE = 32
+INCREMENTAL_PIXEL_THRESHOLD = 24
+INCREMENTAL_MAX_CHANGED_FRACTION = 0.5
+INCREMENTAL_KEYFRAME_INTERVAL = 30
+
+# Adaptive frame sampling (--adaptive_sampling): share of changed thumbnail pixels from which a
+# scene is read, seconds after which one is read regardless, grayscale difference a pixel must
+# exceed to count as changed, and width frames are downscaled to before comparing them
+SAMPLING_CHANGE_THRESHOLD = 0.0005
+SAMPLING_MAX_GAP = 10.0
+SAMPLING_PIXEL_THRESHOLD = 24
+SAMPLING_THUMBNAIL_WIDTH = 320
+
+# Frames sampled per second of video when decoding local video files (--dataset videos:<dir>),
+# 1 matches the 1-second scenes of the ground truth
+VIDEO_SAMPLE_FPS = 1.0
+
+# Model response cache, keyed by (model, prompt hash, frame content hash)
+RESPONSE_CACHE_PATH = "response_cache/responses.sqlite"
+
+# Maximum difference, in seconds, between the scene timestamps of a prediction and its ground truth frame
+SCENE_MATCH_TOLERANCE = 0.05
+
+# Frame level evaluations and run statistics of every run, summaries are queried from it
+RESULTS_STORE_PATH = "results_store/results.sqlite"
+
+# USD per 1M input / output tokens, used for the estimated cost per 1,000 frames in the summary.
+# Local engines cost nothing per token, models missing here get no cost estimate.
+MODEL_PRICING = {
+    "gpt-4o": {"input": 2.50, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "chatgpt-4o-latest": {"input": 5.00, "output": 15.00},
+    "gpt-4-turbo": {"input": 10.00, "output": 30.00},
+    "claude-3-5-sonnet-latest": {"input": 3.00, "output": 15.00},
+    "gemini-1.5-flash": {"input": 0.075, "output": 0.30},
+    "gemini-1.5-flash-8b": {"input": 0.0375, "output": 0.15},
+    "gemini-1.5-pro": {"input": 1.25, "output": 5.00},
+    "rapidocr": {"input": 0.0, "output": 0.0},
+    "easyocr": {"input": 0.0, "output": 0.0},
+}
@@ -0,0 +1,415 @@
+"""
+Local stand-in for the model providers, to load-test the harness offline.
+
+Serves the OpenAI chat-completions (also used by Moondream), Anthropic messages
+and Gemini generate-content wire formats with a lognormal latency, a share of
+failed (500) and rate limited (429) requests, an optional limit on concurrent
+requests, and canned OCR answers. Point the models at it with the base URL
+environment variables, e.g. for a server on port 8000:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8000/v1
+    MOONDREAM_BASE_URL=http://127.0.0.1:8000/v1
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8000
+    GEMINI_BASE_URL=http://127.0.0.1:8000
+
+Answers are the ground truth texts of ocr_ground_truths by default. With
+--frame_pack, every image is matched to its frame in the pack by perceptual hash,
+so each scene is answered with its own ground truth; otherwise a ground truth
+text is picked per image. Requests with several images are answered with a JSON
+object keyed by image index, as asked by the ocr_multi_frame prompt, on one line
+or, with --packed_format fenced, indented in a code fence.
+"""
+
+import argparse
+import base64
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+from PIL import Image
+
+from models import FramePack
+from tasks.dedup import dhash, hamming_distance
+
+
+GEMINI_PATH = re.compile(r"^/v1(?:beta)?/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent)$")
+
+
+def get_args_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser("Mock model provider server", add_help=False)
+    parser.add_argument("--host", default="127.0.0.1", type=str)
+    parser.add_argument("--port", default=8000, type=int)
+    parser.add_argument(
+        "--latency_median",
+        default=1.0,
+        type=float,
+        help="Median response latency in seconds",
+    )
+    parser.add_argument(
+        "--latency_sigma",
+        default=0.5,
+        type=float,
+        help="Sigma of the lognormal latency distribution, 0 for a fixed latency",
+    )
+    parser.add_argument(
+        "--error_rate",
+        default=0.0,
+        type=float,
+        help="Share of requests answered with a 500 error",
+    )
+    parser.add_argument(
+        "--rate_limit_rate",
+        default=0.0,
+        type=float,
+        help="Share of requests answered with a 429 error",
+    )
+    parser.add_argument(
+        "--retry_after",
+        default=1,
+        type=int,
+        help="Retry-After seconds sent with 429 responses",
+    )
+    parser.add_argument(
+        "--max_concurrency",
+        default=0,
+        type=int,
+        help="Requests beyond this many in flight get a 429, 0 for no limit",
+    )
+    parser.add_argument(
+        "--answers",
+        default="ground_truth",
+        choices=["ground_truth", "fixed"],
+        help="Answer with ground truth texts or with --answer_text",
+    )
+    parser.add_argument("--answer_text", default="MOCK OCR TEXT", type=str)
+    parser.add_argument(
+        "--ground_truth_dir",
+        default="ocr_ground_truths",
+        type=str,
+    )
+    parser.add_argument(
+        "--frame_pack",
+        default=None,
+        type=str,
+        help="Frame pack written by snapshot_dataset.py, to answer every frame with its own ground truth",
+    )
+    parser.add_argument(
+        "--packed_format",
+        default="compact",
+        choices=["compact", "fenced"],
+        help="Answer multi-image requests with single-line JSON, or with indented JSON in a code fence like real models often do",
+    )
+    parser.add_argument("--seed", default=0, type=int)
+    return parser
+
+
+class AnswerBook:
+    """Canned OCR answers for the images of a request."""
+
+    def __init__(
+        self,
+        answers: str,
+        answer_text: str,
+        ground_truth_dir: str,
+        frame_pack_path: str = None,
+        packed_format: str = "compact",
+    ):
+        self.answer_text = answer_text
+        self.packed_format = packed_format
+        self.texts = []
+        self._frame_hashes = []
+
+        if answers == "fixed":
+            return
+
+        ground_truth = {}
+        for path in sorted(glob.glob(os.path.join(ground_truth_dir, "*_ground_truth.json"))):
+            with open(path, "r", encoding="utf-8") as f:
+                for scene in json.load(f):
+                    ground_truth[(scene["video_id"], scene["start"])] = scene["ocr_text"]
+        self.texts = list(ground_truth.values())
+
+        if frame_pack_path is not None:
+            frame_pack = FramePack(frame_pack_path)
+            for video in frame_pack.get_videos():
+                for scene in video.scenes:
+                    text = ground_truth.get((video.id, scene.start))
+                    if text is None:
+                        continue
+                    for frame in scene.frames:
+                        image = Image.open(BytesIO(frame_pack.get(frame.url)))
+                        self._frame_hashes.append((dhash(image), text))
+            print(f"Matched {len(self._frame_hashes)} frames of {frame_pack_path} to their ground truth")
+
+    def answer(self, image_bytes: bytes) -> str:
+        if not self.texts:
+            return self.answer_text
+        if self._frame_hashes:
+            image_hash = dhash(Image.open(BytesIO(image_bytes)))
+            return min(
+                self._frame_hashes, key=lambda item: hamming_distance(item[0], image_hash)
+            )[1]
+        # the same image always gets the same text
+        digest = hashlib.sha256(image_bytes).digest()
+        return self.texts[int.from_bytes(digest[:8], "big") % len(self.texts)]
+
+    def answer_all(self, images: list) -> str:
+        if len(images) == 1:
+            return self.answer(images[0])
+        answers = {str(i): self.answer(image) for i, image in enumerate(images)}
+        if self.packed_format == "fenced":
+            return f"```json\n{json.dumps(answers, indent=2)}\n```"
+        return json.dumps(answers)
+
+
+def estimate_tokens(text: str, num_images: int) -> int:
+    # rough figures: 4 characters per token and a fixed cost per image
+    return len(text) // 4 + 765 * num_images
+
+
+class MockProvider:
+    """Latency, failures and answers shared by the request handlers."""
+
+    def __init__(self, args):
+        self.args = args
+        self.answers = AnswerBook(
+            args.answers, args.answer_text, args.ground_truth_dir, args.frame_pack, args.packed_format
+        )
+        self.random = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = Counter()
+
+    def latency(self) -> float:
+        with self.lock:
+            if self.args.latency_sigma <= 0:
+                return self.args.latency_median
+            return self.args.latency_median * self.random.lognormvariate(0, self.args.latency_sigma)
+
+    def failure(self) -> int | None:
+        """
+        Returns:
+            int | None: 429 or 500 for a request that should fail, None otherwise.
+        """
+        with self.lock:
+            draw = self.random.random()
+        if draw < self.args.rate_limit_rate:
+            return 429
+        if draw < self.args.rate_limit_rate + self.args.error_rate:
+            return 500
+        return None
+
+
+def openai_request(body: dict) -> tuple:
+    prompt, images = [], []
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            prompt.append(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                prompt.append(part["text"])
+            elif part.get("type") == "image_url":
+                images.append(base64.b64decode(part["image_url"]["url"].split(",", 1)[1]))
+    return " ".join(prompt), images
+
+
+def anthropic_request(body: dict) -> tuple:
+    prompt, images = [], []
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            prompt.append(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                prompt.append(part["text"])
+            elif part.get("type") == "image":
+                images.append(base64.b64decode(part["source"]["data"]))
+    return " ".join(prompt), images
+
+
+def gemini_request(body: dict) -> tuple:
+    prompt, images = [], []
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            if "text" in part:
+                prompt.append(part["text"])
+            inline_data = part.get("inline_data") or part.get("inlineData")
+            if inline_data is not None:
+                images.append(base64.b64decode(inline_data["data"]))
+    return " ".join(prompt), images
+
+
+def openai_response(model: str, text: str, input_tokens: int, output_tokens: int) -> dict:
+    return {
+        "id": f"chatcmpl-mock-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": input_tokens,
+            "completion_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+def anthropic_response(model: str, text: str, input_tokens: int, output_tokens: int) -> dict:
+    return {
+        "id": f"msg_mock_{time.time_ns()}",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+    }
+
+
+def gemini_response(model: str, text: str, input_tokens: int, output_tokens: int) -> dict:
+    return {
+        "candidates": [
+            {
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+            }
+        ],
+        "usageMetadata": {
+            "promptTokenCount": input_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": input_tokens + output_tokens,
+        },
+        "modelVersion": model,
+    }
+
+
+def error_body(provider: str, status: int) -> dict:
+    message = "Rate limit exceeded (mock)" if status == 429 else "Internal server error (mock)"
+    if provider == "anthropic":
+        error_type = "rate_limit_error" if status == 429 else "api_error"
+        return {"type": "error", "error": {"type": error_type, "message": message}}
+    if provider == "google":
+        error_status = "RESOURCE_EXHAUSTED" if status == 429 else "INTERNAL"
+        return {"error": {"code": status, "message": message, "status": error_status}}
+    error_type = "rate_limit_error" if status == 429 else "server_error"
+    return {"error": {"message": message, "type": error_type, "code": None}}
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    provider: MockProvider = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, body, headers: dict = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_sse(self, body: dict) -> None:
+        data = f"data: {json.dumps(body)}\r\n\r\n".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        path, _, query = self.path.partition("?")
+        gemini_match = GEMINI_PATH.match(path)
+        if path.endswith("/chat/completions"):
+            provider, parse, respond = "openai", openai_request, openai_response
+        elif path.endswith("/messages"):
+            provider, parse, respond = "anthropic", anthropic_request, anthropic_response
+        elif gemini_match is not None:
+            provider, parse, respond = "google", gemini_request, gemini_response
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown endpoint {path}"}})
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        model = gemini_match.group("model") if gemini_match is not None else body.get("model", "mock")
+
+        mock = self.provider
+        with mock.lock:
+            mock.in_flight += 1
+            over_limit = 0 < mock.args.max_concurrency < mock.in_flight
+        try:
+            # requests over the concurrency limit are turned away without waiting
+            status = 429 if over_limit else None
+            if status is None:
+                time.sleep(mock.latency())
+                status = mock.failure()
+            if status is not None:
+                with mock.lock:
+                    mock.stats[(provider, status)] += 1
+                headers = {"Retry-After": str(mock.args.retry_after)} if status == 429 else None
+                self.send_json(status, error_body(provider, status), headers)
+                return
+
+            prompt, images = parse(body)
+            text = mock.answers.answer_all(images)
+            response = respond(
+                model, text, estimate_tokens(prompt, len(images)), estimate_tokens(text, 0)
+            )
+            with mock.lock:
+                mock.stats[(provider, 200)] += 1
+            if gemini_match is not None and gemini_match.group("method") == "streamGenerateContent":
+                if "alt=sse" in query:
+                    self.send_sse(response)
+                else:
+                    self.send_json(200, [response])
+            else:
+                self.send_json(200, response)
+        finally:
+            with mock.lock:
+                mock.in_flight -= 1
+
+
+def main(args):
+    MockProviderHandler.provider = MockProvider(args)
+    server = ThreadingHTTPServer((args.host, args.port), MockProviderHandler)
+    server.daemon_threads = True
+    print(f"Mock provider listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for (provider, status), count in sorted(MockProviderHandler.provider.stats.items()):
+            print(f"{provider:<10} {status}: {count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Mock model provider server", parents=[get_args_parser()]
+    )
+    args = parser.parse_args()
+
+    main(args)
@@ -1,6 +1,30 @@
-from .openai import Openai
-from .google import Gemini
-from .anthropic import Claude
-from .rapidocr import Rapidocr
-from .easyocr import Easyocr
-from .moondream import Moondream
\ No newline at end of file
+import importlib
+
+from .base_model import BaseModel
+from .frame_cache import FrameCache
+from .frame_pack import FramePack, FramePackWriter
+from .http_client import FramePrefetcher, configure_http
+from .incremental import IncrementalOCR
+from .onnx_session import OrtSessionConfig, GRAPH_OPTIMIZATION_LEVELS, EXECUTION_MODES
+from .preprocess import ImagePreprocessor, IMAGE_FORMATS
+from .registry import MODEL_REGISTRY, ModelSpec
+from .response_cache import ResponseCache, CACHE_MODES
+from .tracing import LatencyHistogram, TRACER
+from .video_source import LocalVideoSource, iter_video_frames
+from .worker_pool import LocalEnginePool
+
+# Model classes are imported on first use, so their SDKs are only loaded for the selected models
+_LAZY_MODELS = {
+    "Openai": ".openai",
+    "Gemini": ".google",
+    "Claude": ".anthropic",
+    "Rapidocr": ".rapidocr",
+    "Easyocr": ".easyocr",
+    "Moondream": ".moondream",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_MODELS:
+        return getattr(importlib.import_module(_LAZY_MODELS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,19 +1,88 @@
 from abc import ABC, abstractmethod
-import requests
+import asyncio
 from PIL import Image
 from io import BytesIO
-import base64
+import hashlib
 import textwrap
 
+from .http_client import download_image
+from .preprocess import ImagePreprocessor
+from .tracing import span
+from .video_source import LocalVideoSource
+
+
+
 class BaseModel(ABC):
+    # Shared FrameCache used by every model instance, set by run.py when caching is enabled
+    frame_cache = None
+    # FramePack (or LocalVideoSource) frames are read from instead of the network,
+    # set by run.py for --dataset local:<path> and videos:<dir>
+    frame_pack = None
+    # Provider lane for concurrent requests, None for local engines
+    provider = None
+    # Turns frames into the image payload of the API models, set by run.py from the --image_* options
+    image_preprocessor = ImagePreprocessor()
+    # FramePrefetcher downloading upcoming frames in the background, set by run.py
+    prefetcher = None
+    # Return answers as the API sent them, set by the OCR task for packed requests,
+    # whose JSON answer is split first and post-processed per frame
+    raw_output = False
+
     def __init__(self, model_name: str, api_key: str):
         self.model_name = model_name
         self.api_key = api_key
+        self._async_client = None
+        self._async_client_loop = None
 
     @abstractmethod
     def describe(self, frame_urls: list, prompt: str):
-        
+        """
+        Returns:
+            tuple: (processing_time, output), API models add the usage of the request as
+                a third element: {"input_tokens": ..., "output_tokens": ..., "payload_bytes": ...},
+                local engines in incremental mode the share of the frame they read: {"reprocessed_fraction": ...}.
+        """
         pass
+
+    def describe_batch(self, scene_frame_urls: list, prompt: str) -> list:
+        """
+        Describe several scenes at once, one describe result per scene.
+
+        Models with a batched inference path override this, the default describes the scenes one by one.
+        """
+        return [self.describe(frame_urls, prompt) for frame_urls in scene_frame_urls]
+
+    async def describe_async(self, frame_urls: list, prompt: str):
+        """
+        Async variant of describe. Models whose SDK has no async client run describe in a worker thread.
+        """
+        return await asyncio.to_thread(self.describe, frame_urls, prompt)
+
+    def create_async_client(self):
+        """Create the SDK's async client, None if the SDK has none."""
+        return None
+
+    def get_async_client(self):
+        """Return the async client bound to the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        if self._async_client_loop is not loop:
+            self._async_client = self.create_async_client()
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def encode_images_async(self, frame_urls: list) -> list:
+        return await asyncio.gather(
+            *(asyncio.to_thread(self.encode_image, url) for url in frame_urls)
+        )
+
+    def warmup(self) -> float:
+        """
+        Load whatever the model needs before the first frame (weights, sessions, ...).
+
+        Returns:
+            float: Time spent warming up, in seconds.
+        """
+        return 0.0
     
     
     def clean_ocr_text(self, text : str):
@@ -26,9 +95,76 @@ class BaseModel(ABC):
         text = text.replace("•", "  *")
         return textwrap.indent(text, "<", predicate=lambda _: True)
 
+    def postprocess_output(self, text: str) -> str:
+        """Turn an answer of the API into the model output, models reformatting their answers override this."""
+        return text
+
+    def fetch_image_bytes(self, image_url: str) -> bytes:
+        """
+        Fetch the raw bytes of an image. Frames of the local frame pack are returned as
+        zero-copy views, everything else goes through the shared frame cache when one is set.
+
+        Args:
+            image_url (str): URL of the image.
+
+        Returns:
+            bytes: Raw image bytes.
+        """
+        if self.frame_pack is not None and image_url in self.frame_pack:
+            return self.frame_pack.get(image_url)
+        if self.frame_cache is not None:
+            return self.frame_cache.get_bytes(image_url, self._download_image)
+        return self._download_image(image_url)
+
+    def image_content_hash(self, image_url: str) -> str:
+        """sha256 of the raw image bytes, served from the frame pack or frame cache index when possible."""
+        if self.frame_pack is not None and image_url in self.frame_pack:
+            return self.frame_pack.content_hash(image_url)
+        if self.frame_cache is not None:
+            return self.frame_cache.content_hash(image_url, self._download_image)
+        return hashlib.sha256(self.fetch_image_bytes(image_url)).hexdigest()
+
+    def needs_download(self, image_url: str) -> bool:
+        """Whether reading the image goes to the network, i.e. it is neither packed nor cached."""
+        if not image_url.startswith(("http://", "https://")):
+            return False
+        if self.frame_pack is not None and image_url in self.frame_pack:
+            return False
+        return self.frame_cache is None or image_url not in self.frame_cache
+
+    def _download_image(self, image_url: str) -> bytes:
+        if self.frame_pack is not None:
+            data = self.frame_pack.get(image_url)
+            if data is not None:
+                return data
+        if self.prefetcher is not None:
+            data = self.prefetcher.take(image_url)
+            if data is not None:
+                return data
+        return download_image(image_url)
+
+    @staticmethod
+    def _decode_image(image_bytes: bytes) -> Image.Image:
+        with span("decode"):
+            image = Image.open(BytesIO(image_bytes))
+            image.load()
+            return image
+
+    @staticmethod
+    def _decoded_size(image: Image.Image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    @staticmethod
+    def request_usage(base64_images: list, token_usage: dict = None) -> dict:
+        """Usage of a request: the token counts of the response plus the size of the image payload."""
+        return {
+            **(token_usage or {}),
+            "payload_bytes": sum(len(base64_image) for base64_image in base64_images),
+        }
+
     def encode_image(self, image_url: str) -> str:
         """
-        Encode an image from a URL to base64.
+        Encode an image from a URL to base64 with the image preprocessor.
 
         Args:
             image_url (str): URL of the image.
@@ -37,23 +173,35 @@ class BaseModel(ABC):
             str: Base64 encoded image.
         """
         try:
-            response = requests.get(image_url)
-            response.raise_for_status()
-            image = Image.open(BytesIO(response.content))
-            buffered = BytesIO()
-            image.save(buffered, format="JPEG")
-            return base64.b64encode(buffered.getvalue()).decode("utf-8")
+            if self.frame_cache is not None:
+                return self.frame_cache.get_encoded(
+                    image_url,
+                    self._download_image,
+                    self.image_preprocessor,
+                    variant=self.image_preprocessor.variant,
+                )
+            return self.image_preprocessor(self._download_image(image_url))
         except Exception as e:
             raise AttributeError(f"Error encoding image from {image_url}: {str(e)}")
         
         
     def load_image(self, image_url):
+        # decoded frames of local videos are handed over as they are, without an encode round trip
+        if isinstance(self.frame_pack, LocalVideoSource) and image_url in self.frame_pack:
+            try:
+                return Image.fromarray(self.frame_pack.get_array(image_url))
+            except Exception as e:
+                raise AttributeError(f"Error decoding frame {image_url}: {str(e)}")
+
         if image_url.startswith("https://storage.googleapis.com/videodb") or image_url.startswith(
                 "https://storage.videodb.io"):
-            response = requests.get(image_url)
-            if response.status_code == 200:
-                return Image.open(BytesIO(response.content))
-            else:
+            try:
+                if self.frame_cache is not None:
+                    return self.frame_cache.get_decoded(
+                        image_url, self._download_image, self._decode_image, self._decoded_size
+                    )
+                return self._decode_image(self.fetch_image_bytes(image_url))
+            except Exception as e:
                 raise AttributeError(f"Error encoding image from {image_url}: {str(e)}")
                 
         else:
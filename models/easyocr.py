@@ -1,53 +1,140 @@
 import time
+from functools import lru_cache
+
 import numpy as np
 import easyocr
+import torch
 
 from .base_model import BaseModel
+from .incremental import IncrementalOCR
+from .tracing import span
+
+
+@lru_cache(maxsize=None)
+def load_reader() -> easyocr.Reader:
+    """Load the EasyOCR reader once per process, every Easyocr instance shares it."""
+    return easyocr.Reader(['en'], gpu=False, verbose=False)
+
 
 class Easyocr(BaseModel):
 
-    def __init__(self,  model_name: str):
+    def __init__(
+        self,
+        model_name: str,
+        num_threads: int = None,
+        n_width: int = None,
+        n_height: int = None,
+        incremental: dict = None,
+    ):
          
         super().__init__(model_name,"")
         
         self.model_name = model_name
+        # torch intra-op threads, pinned when several engine processes share the machine
+        self.num_threads = num_threads
+        # frames of a batch are resized to n_width x n_height by readtext_batched
+        self.n_width = n_width
+        self.n_height = n_height
+        self.reader = None
+        # IncrementalOCR settings to re-read only the changed regions of a frame, None reads every frame in full
+        self.incremental = (
+            IncrementalOCR(self.read_boxes, **incremental) if incremental is not None else None
+        )
         
         
-        
+    def warmup(self) -> float:
+        start_time = time.time()
+        if self.num_threads is not None:
+            torch.set_num_threads(self.num_threads)
+        self.reader = load_reader()
+        self.reader.readtext(np.full((64, 256, 3), 255, dtype=np.uint8))
+        return time.time() - start_time
+
+
+
+    @staticmethod
+    def extract_text_from_results(results):
+        """Extracts text from a list of tuples containing bounding box data, text, and confidence scores."""
+        extracted_text = []
+        if results is None:
+            return ""
+        for result in results:
+            text = result[1]  # Access the second element of each tuple (the text)
+            extracted_text.append(text)
+        return " ".join(extracted_text)
+
+
+    def read_boxes(self, image) -> list:
+        """(polygon, text, confidence) of every text box EasyOCR finds in the image."""
+        return self.reader.readtext(np.array(image))
+
+
     def describe(self, frame_urls, prompt):
         
-        def extract_text_from_results(results):
-            """Extracts text from a list of tuples containing bounding box data, text, and confidence scores."""
-            extracted_text = []
-            if results is None:
-                return ""
-            for result in results:
-                text = result[1]  # Access the second element of each tuple (the text)
-                extracted_text.append(text)
-            return " ".join(extracted_text)
-        
-        
         images = [self.load_image(url) for url in frame_urls] 
        
-        reader = easyocr.Reader(['en'], gpu=False, verbose=False)
+        if self.reader is None:
+            self.warmup()
         
         try:   
             
             start_time = time.time()
             
-            response = extract_text_from_results( reader.readtext(np.array(images[0])) )
+            with span("inference"):
+                if self.incremental is not None:
+                    response, reprocessed_fraction = self.incremental(images[0])
+                else:
+                    response = self.extract_text_from_results( self.reader.readtext(np.array(images[0])) )
             end_time = time.time()
             
-            ocr_text = self.to_markdown(response)
-            cleaned_ocr_text = self.clean_ocr_text(ocr_text)
+            with span("postprocess"):
+                ocr_text = self.to_markdown(response)
+                cleaned_ocr_text = self.clean_ocr_text(ocr_text)
             
             processing_time = end_time - start_time
         
+            if self.incremental is not None:
+                return processing_time, cleaned_ocr_text, {"reprocessed_fraction": reprocessed_fraction}
             return processing_time, cleaned_ocr_text
         
         except Exception as e:
             raise AttributeError(f"Error in EasyOCR Model: {e}")
-        
-    
 
 
+    def describe_batch(self, scene_frame_urls, prompt):
+        
+        # every frame is diffed against the ones before it, so incremental frames are read one by one
+        if self.incremental is not None:
+            return super().describe_batch(scene_frame_urls, prompt)
+        
+        images = [np.array(self.load_image(frame_urls[0])) for frame_urls in scene_frame_urls]
+       
+        if self.reader is None:
+            self.warmup()
+        
+        try:   
+            
+            start_time = time.time()
+            
+            with span("inference_batch"):
+                batch_results = self.reader.readtext_batched(
+                    images,
+                    n_width=self.n_width,
+                    n_height=self.n_height,
+                    batch_size=len(images),
+                )
+            end_time = time.time()
+            
+            # the batch runs as a single call, so every frame is charged its share of it
+            processing_time = (end_time - start_time) / len(images)
+            
+            outputs = []
+            for results in batch_results:
+                with span("postprocess"):
+                    ocr_text = self.to_markdown(self.extract_text_from_results(results))
+                    outputs.append((processing_time, self.clean_ocr_text(ocr_text)))
+        
+            return outputs
+        
+        except Exception as e:
+            raise AttributeError(f"Error in EasyOCR Model: {e}")
@@ -0,0 +1,318 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+
+class FrameCache:
+    """
+    Persistent, content-addressed on-disk cache for video frames.
+
+    Frames are stored once per content hash (sha256 of the raw bytes), and every
+    URL that resolved to those bytes points at the same blob. Derived forms of a
+    frame (e.g. the base64 JPEG sent to the VLM APIs) are stored next to the raw
+    bytes under ``<sha256>.<variant>``. The total size on disk is bounded and the
+    least recently used blobs are evicted first.
+
+    An optional in-memory LRU layer in front of the disk keeps raw, encoded and
+    decoded frames, so models running side by side share a single fetch and decode.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int,
+        memory_max_bytes: int = 0,
+        store_raw: bool = True,
+    ):
+        """
+        Args:
+            cache_dir (str): Directory of the blobs and the index.
+            max_bytes (int): Size bound of the blobs on disk.
+            memory_max_bytes (int): Size bound of the in-memory layer, 0 disables it.
+            store_raw (bool): Keep raw frame bytes on disk. Disabled when the frames
+                already live in a local frame pack, then only derived forms are stored.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.store_raw = store_raw
+        self.memory_max_bytes = memory_max_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "index.sqlite"), check_same_thread=False
+        )
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS blobs_last_access ON blobs (last_access);
+            """
+        )
+        self._conn.commit()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.encoded_hits = 0
+        self.encoded_misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            (stored_bytes,) = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "encoded_hits": self.encoded_hits,
+            "encoded_misses": self.encoded_misses,
+            "evictions": self.evictions,
+            "stored_bytes": stored_bytes,
+        }
+
+    def _memory_get(self, key: str) -> Any:
+        if key not in self._memory:
+            return None
+        self._memory.move_to_end(key)
+        return self._memory[key][0]
+
+    def _memory_put(self, key: str, value: Any, size: int) -> None:
+        if size > self.memory_max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+        self._memory[key] = (value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_max_bytes:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.blob_dir, key[:2], key)
+
+    def _read_blob(self, key: str) -> bytes | None:
+        row = self._conn.execute(
+            "SELECT 1 FROM blobs WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._blob_path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self._conn.execute("DELETE FROM blobs WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+        self._conn.execute(
+            "UPDATE blobs SET last_access = ? WHERE key = ?", (time.time(), key)
+        )
+        self._conn.commit()
+        return data
+
+    def _write_blob(self, key: str, data: bytes) -> None:
+        path = self._blob_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO blobs (key, size, last_access) VALUES (?, ?, ?)",
+            (key, len(data), time.time()),
+        )
+        self._conn.commit()
+        self._evict()
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blobs"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM blobs ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._blob_path(key))
+            except FileNotFoundError:
+                pass
+            self._conn.execute("DELETE FROM blobs WHERE key = ?", (key,))
+            self._conn.execute("DELETE FROM urls WHERE sha256 = ?", (key,))
+            total -= size
+            self.evictions += 1
+        self._conn.commit()
+
+    def _lookup(self, url: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256 FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def __contains__(self, url: str) -> bool:
+        """Whether the raw bytes of the frame behind url are cached."""
+        sha256 = self._lookup(url)
+        if sha256 is None:
+            return False
+        with self._lock:
+            if self._memory_get(sha256) is not None:
+                return True
+            row = self._conn.execute(
+                "SELECT 1 FROM blobs WHERE key = ?", (sha256,)
+            ).fetchone()
+        return row is not None
+
+    def content_hash(self, url: str, fetch: Callable[[str], bytes]) -> str:
+        """Return the sha256 of the frame behind ``url``, fetching it if needed."""
+        sha256 = self._lookup(url)
+        if sha256 is not None:
+            return sha256
+        return hashlib.sha256(self.get_bytes(url, fetch)).hexdigest()
+
+    def get_bytes(self, url: str, fetch: Callable[[str], bytes]) -> bytes:
+        """
+        Return the raw bytes of the frame behind ``url``.
+
+        Args:
+            url (str): URL of the frame.
+            fetch (Callable): Called with ``url`` on a cache miss, returns the raw bytes.
+
+        Returns:
+            bytes: Raw frame bytes.
+        """
+        sha256 = self._lookup(url)
+        if sha256 is not None:
+            with self._lock:
+                data = self._memory_get(sha256)
+                if data is None:
+                    data = self._read_blob(sha256)
+                if data is not None:
+                    self.hits += 1
+                    self._memory_put(sha256, data, len(data))
+                    return data
+
+        data = fetch(url)
+        sha256 = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            self.misses += 1
+            self._memory_put(sha256, data, len(data))
+            if self.store_raw and self._read_blob(sha256) is None:
+                self._write_blob(sha256, data)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO urls (url, sha256) VALUES (?, ?)",
+                (url, sha256),
+            )
+            self._conn.commit()
+        return data
+
+    def get_encoded(
+        self,
+        url: str,
+        fetch: Callable[[str], bytes],
+        encode: Callable[[bytes], str],
+        variant: str = "jpeg.b64",
+    ) -> str:
+        """
+        Return an encoded form of the frame behind ``url``.
+
+        Args:
+            url (str): URL of the frame.
+            fetch (Callable): Called with ``url`` when the raw bytes are not cached.
+            encode (Callable): Turns the raw bytes into the encoded string on a miss.
+            variant (str): Name of the encoded form, part of the cache key.
+
+        Returns:
+            str: The encoded frame.
+        """
+        sha256 = self._lookup(url)
+        if sha256 is not None:
+            encoded = self._get_encoded_blob(f"{sha256}.{variant}")
+            if encoded is not None:
+                return encoded
+
+        raw = self.get_bytes(url, fetch)
+        key = f"{hashlib.sha256(raw).hexdigest()}.{variant}"
+
+        encoded = self._get_encoded_blob(key)
+        if encoded is not None:
+            return encoded
+
+        encoded = encode(raw)
+
+        with self._lock:
+            self.encoded_misses += 1
+            self._memory_put(key, encoded, len(encoded))
+            self._write_blob(key, encoded.encode("utf-8"))
+        return encoded
+
+    def _get_encoded_blob(self, key: str) -> str | None:
+        with self._lock:
+            encoded = self._memory_get(key)
+            if encoded is None:
+                data = self._read_blob(key)
+                if data is None:
+                    return None
+                encoded = data.decode("utf-8")
+                self._memory_put(key, encoded, len(encoded))
+            self.encoded_hits += 1
+            return encoded
+
+    def get_decoded(
+        self,
+        url: str,
+        fetch: Callable[[str], bytes],
+        decode: Callable[[bytes], Any],
+        size: Callable[[Any], int],
+    ) -> Any:
+        """
+        Return the decoded frame behind ``url``, kept in the in-memory layer only.
+
+        Args:
+            url (str): URL of the frame.
+            fetch (Callable): Called with ``url`` when the raw bytes are not cached.
+            decode (Callable): Turns the raw bytes into the decoded frame on a miss.
+            size (Callable): Memory footprint of a decoded frame in bytes.
+
+        Returns:
+            Any: The decoded frame.
+        """
+        sha256 = self._lookup(url)
+        if sha256 is not None:
+            with self._lock:
+                decoded = self._memory_get(f"{sha256}.decoded")
+            if decoded is not None:
+                return decoded
+
+        raw = self.get_bytes(url, fetch)
+        decoded = decode(raw)
+        if self.memory_max_bytes:
+            with self._lock:
+                self._memory_put(
+                    f"{hashlib.sha256(raw).hexdigest()}.decoded", decoded, size(decoded)
+                )
+        return decoded
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
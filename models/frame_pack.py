@@ -0,0 +1,164 @@
+import hashlib
+import json
+import mmap
+import struct
+from typing import Dict, List, Tuple
+
+
+MAGIC = b"OCRPACK1"
+# magic, index offset, index length
+HEADER = struct.Struct("<8sQQ")
+
+
+class PackedFrame:
+    def __init__(self, url: str):
+        self.url = url
+
+
+class PackedScene:
+    def __init__(self, start: float, end: float, frames: List[PackedFrame]):
+        self.start = start
+        self.end = end
+        self.frames = frames
+
+
+class PackedVideo:
+    """Stand-in for a VideoDB video whose scenes come from a frame pack."""
+
+    def __init__(self, video_id: str, name: str, scenes: List[PackedScene]):
+        self.id = video_id
+        self.name = name
+        self.scenes = scenes
+
+
+class FramePackWriter:
+    """
+    Writes a frame pack: a header, the frame bytes back to back and a JSON index
+    of videos, scenes and frames with the offset and length of every frame.
+    Identical frames are stored once.
+    """
+
+    def __init__(self, path: str, collection_id: str = None):
+        self.path = path
+        self.collection_id = collection_id
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, 0, 0))
+        self._blobs = {}
+        self._videos = {}
+
+    def add_scene(
+        self,
+        video_id: str,
+        video_name: str,
+        start: float,
+        end: float,
+        frames: List[Tuple[str, bytes]],
+    ) -> None:
+        """
+        Args:
+            video_id (str): Id of the video the scene belongs to.
+            video_name (str): Name of the video.
+            start (float): Scene start time.
+            end (float): Scene end time.
+            frames (List[Tuple[str, bytes]]): (url, raw bytes) of every frame of the scene.
+        """
+        video = self._videos.setdefault(
+            video_id, {"id": video_id, "name": video_name, "scenes": []}
+        )
+
+        packed_frames = []
+        for url, data in frames:
+            sha256 = hashlib.sha256(data).hexdigest()
+            if sha256 not in self._blobs:
+                self._blobs[sha256] = (self._file.tell(), len(data))
+                self._file.write(data)
+            offset, length = self._blobs[sha256]
+            packed_frames.append(
+                {"url": url, "sha256": sha256, "offset": offset, "length": length}
+            )
+
+        video["scenes"].append({"start": start, "end": end, "frames": packed_frames})
+
+    def close(self) -> None:
+        index = json.dumps(
+            {"collection_id": self.collection_id, "videos": list(self._videos.values())}
+        ).encode("utf-8")
+        index_offset = self._file.tell()
+        self._file.write(index)
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, index_offset, len(index)))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FramePack:
+    """
+    Read-only, memory-mapped frame pack. Frames are returned as memoryview slices
+    of the mapping, so reading a frame does not copy it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, index_offset, index_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a frame pack")
+
+        index = json.loads(
+            bytes(self._view[index_offset : index_offset + index_length]).decode("utf-8")
+        )
+        self.collection_id = index["collection_id"]
+        self._index = index["videos"]
+        self._frames: Dict[str, dict] = {
+            frame["url"]: frame
+            for video in self._index
+            for scene in video["scenes"]
+            for frame in scene["frames"]
+        }
+
+    def __reduce__(self):
+        # worker processes map the file themselves
+        return (FramePack, (self.path,))
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._frames
+
+    def get(self, url: str) -> memoryview | None:
+        frame = self._frames.get(url)
+        if frame is None:
+            return None
+        return self._view[frame["offset"] : frame["offset"] + frame["length"]]
+
+    def content_hash(self, url: str) -> str | None:
+        frame = self._frames.get(url)
+        return frame["sha256"] if frame is not None else None
+
+    def get_videos(self, video_ids: List[str] = None) -> List[PackedVideo]:
+        videos = [
+            PackedVideo(
+                video["id"],
+                video["name"],
+                [
+                    PackedScene(
+                        scene["start"],
+                        scene["end"],
+                        [PackedFrame(frame["url"]) for frame in scene["frames"]],
+                    )
+                    for scene in video["scenes"]
+                ],
+            )
+            for video in self._index
+        ]
+        if video_ids:
+            video_ids = list(video_ids)
+            by_id = {video.id: video for video in videos}
+            videos = [by_id[video_id] for video_id in video_ids if video_id in by_id]
+        return videos
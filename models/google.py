@@ -2,18 +2,42 @@ import google.generativeai as genai
 import time
 
 from .base_model import BaseModel
+from .tracing import span
 
 
 class Gemini(BaseModel):
 
-    def __init__(self,  model_name: str, api_key: str):
+    provider = "google"
+
+    def __init__(self,  model_name: str, api_key: str, base_url: str = None):
          
         super().__init__(model_name, api_key)
-        genai.configure(api_key=api_key)
+        if base_url is None:
+            genai.configure(api_key=api_key)
+        else:
+            # only the REST transport can be pointed at a plain http endpoint
+            genai.configure(
+                api_key=api_key, transport="rest", client_options={"api_endpoint": base_url}
+            )
         self.model_name = model_name
         
         
         
+    @staticmethod
+    def extract_usage(response) -> dict | None:
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return None
+        return {
+            "input_tokens": usage.prompt_token_count,
+            "output_tokens": usage.candidates_token_count,
+        }
+
+
+    def postprocess_output(self, text: str) -> str:
+        return self.clean_ocr_text(self.to_markdown(text))
+
+
     def describe(self, frame_urls, prompt):
         
         
@@ -24,29 +48,36 @@ class Gemini(BaseModel):
         
         try:   
             
-            image_dicts = [
-                {
-                    'mime_type': 'image/jpeg',
-                    'data': img
-                }
-                for img in images ]
-    
-            content_parts = image_dicts + [prompt]
+            with span("request_build"):
+                image_dicts = [
+                    {
+                        'mime_type': self.image_preprocessor.mime_type,
+                        'data': img
+                    }
+                    for img in images ]
+        
+                content_parts = image_dicts + [prompt]
             
             start_time = time.time()
             
-            response = model.generate_content(content_parts, stream=True)
-           
-            response.resolve()
+            with span("request"):
+                response = model.generate_content(content_parts, stream=True)
+               
+                response.resolve()
             
             end_time = time.time()
 
-            out_text = self.to_markdown(response.text)
-            cleaned_out_text = self.clean_ocr_text(out_text)
+            with span("postprocess"):
+                if self.raw_output:
+                    cleaned_out_text = response.text
+                else:
+                    cleaned_out_text = self.postprocess_output(response.text)
 
             processing_time = end_time - start_time
         
-            return processing_time, cleaned_out_text
+            usage = self.request_usage(images, self.extract_usage(response))
+
+            return processing_time, cleaned_out_text, usage
         
         except Exception as e:
             raise AttributeError(f"Error in Google VLM: {e}")
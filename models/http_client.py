@@ -0,0 +1,132 @@
+import contextvars
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .tracing import span
+
+
+# Settings of the shared session, changed with configure_http
+_settings = {"timeout": 30.0, "retries": 3, "pool_size": 16}
+_session = None
+_session_lock = threading.Lock()
+
+
+def configure_http(timeout: float = None, retries: int = None, pool_size: int = None) -> None:
+    """
+    Change the timeout, retries and connection pool size of frame downloads.
+    The shared session is rebuilt on its next use.
+    """
+    global _session
+    with _session_lock:
+        if timeout is not None:
+            _settings["timeout"] = timeout
+        if retries is not None:
+            _settings["retries"] = retries
+        if pool_size is not None:
+            _settings["pool_size"] = pool_size
+        _session = None
+
+
+def http_settings() -> dict:
+    return dict(_settings)
+
+
+def get_session() -> requests.Session:
+    """Keep-alive session shared by every frame download of the process."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=_settings["retries"],
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({"GET"}),
+            )
+            adapter = HTTPAdapter(
+                pool_connections=_settings["pool_size"],
+                pool_maxsize=_settings["pool_size"],
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def download_image(image_url: str) -> bytes:
+    with span("download"):
+        response = get_session().get(image_url, timeout=_settings["timeout"])
+        response.raise_for_status()
+        return response.content
+
+
+class FramePrefetcher:
+    """
+    Bounded look-ahead of frame downloads.
+
+    schedule() starts downloading upcoming frames in background threads while the
+    current frame is inferred, take() hands a scheduled frame over, waiting for it
+    if it is still in flight. At most depth frames are in flight or waiting to be
+    taken, the oldest one is dropped when more are scheduled.
+    """
+
+    def __init__(self, depth: int, workers: int = None):
+        """
+        Args:
+            depth (int): Maximum number of frames downloaded ahead.
+            workers (int): Download threads, depth by default.
+        """
+        self.depth = depth
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or depth, thread_name_prefix="frame-prefetch"
+        )
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self.taken = 0
+        self.dropped = 0
+
+    def schedule(self, image_urls: Iterable[str]) -> None:
+        with self._lock:
+            for image_url in image_urls:
+                if image_url in self._futures:
+                    continue
+                if len(self._futures) >= self.depth:
+                    _, future = self._futures.popitem(last=False)
+                    future.cancel()
+                    self.dropped += 1
+                # the download spans are attributed to the model and video that scheduled them
+                context = contextvars.copy_context()
+                self._futures[image_url] = self._executor.submit(
+                    context.run, download_image, image_url
+                )
+
+    def take(self, image_url: str) -> bytes | None:
+        """
+        Returns:
+            bytes | None: The prefetched frame, None if it was not scheduled or its download failed.
+        """
+        with self._lock:
+            future = self._futures.pop(image_url, None)
+        if future is None:
+            return None
+        with span("download_wait"):
+            try:
+                data = future.result()
+            except Exception:
+                # the caller downloads it again and reports the failure
+                return None
+        self.taken += 1
+        return data
+
+    def stats(self) -> dict:
+        return {"taken": self.taken, "dropped": self.dropped}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,236 @@
+from collections import namedtuple
+from typing import Callable, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .tracing import span
+
+
+# Axis-aligned bounds of a detected text box in frame coordinates, with its text and confidence
+TextBox = namedtuple("TextBox", ["x0", "y0", "x1", "y1", "text", "score"])
+
+
+class IncrementalOCR:
+    """
+    Re-reads only the parts of a frame that changed since the frames before it.
+
+    Frames are compared tile by tile with a reference image holding, for every tile,
+    the pixels its cached text was read from. Changed tiles, grown by a margin and
+    by every cached text box they cut through, are cropped and read by the engine;
+    the boxes read from them replace the cached boxes they cover and the cached text
+    of the rest of the frame is kept. Only re-read tiles update the reference, so
+    slow changes cannot accumulate unnoticed below the pixel threshold.
+
+    The whole frame is read instead when there is no reference of the same size,
+    when the regions to re-read cover more than max_changed_fraction of it, and every
+    keyframe_interval frames.
+    """
+
+    def __init__(
+        self,
+        read: Callable[[Image.Image], list],
+        tile_size: int = 32,
+        pixel_threshold: int = 24,
+        max_changed_fraction: float = 0.5,
+        keyframe_interval: int = 30,
+        margin: int = 1,
+        min_changed_pixels: int = 4,
+    ):
+        """
+        Args:
+            read (Callable): Runs the engine on an image, returning its (polygon, text, score) results.
+            tile_size (int): Side of the tiles frames are compared by, in pixels.
+            pixel_threshold (int): Grayscale difference above which a pixel counts as changed.
+            max_changed_fraction (float): Share of the frame above which the whole frame is read.
+            keyframe_interval (int): Read the whole frame every this many frames, None or 0 never forces it.
+            margin (int): Tiles around the changed ones re-read with them, for the detector's context.
+            min_changed_pixels (int): Changed pixels a tile needs to be re-read, so compression noise is ignored.
+        """
+        self.read = read
+        self.tile_size = tile_size
+        self.pixel_threshold = pixel_threshold
+        self.max_changed_fraction = max_changed_fraction
+        self.keyframe_interval = keyframe_interval
+        self.margin = margin
+        self.min_changed_pixels = min_changed_pixels
+
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the cached frame and text, so the next frame is read whole, e.g. at the start of a video."""
+        self.reference = None
+        self.boxes = []
+        self.frames_since_keyframe = 0
+
+    def __call__(self, image: Image.Image) -> Tuple[str, float]:
+        """
+        Returns:
+            tuple: (text of the frame, share of its pixels that were read by the engine).
+        """
+        boxes, reprocessed_fraction = self.read_boxes(image)
+        return " ".join(box.text for box in boxes), reprocessed_fraction
+
+    def read_boxes(self, image: Image.Image) -> Tuple[List[TextBox], float]:
+        """
+        Returns:
+            tuple: (text boxes of the frame in reading order, share of its pixels that were read by the engine).
+        """
+        gray = np.asarray(image.convert("L"), dtype=np.int16)
+        height, width = gray.shape
+
+        self.frames_since_keyframe += 1
+        keyframe_due = (
+            self.keyframe_interval and self.frames_since_keyframe >= self.keyframe_interval
+        )
+        if self.reference is None or self.reference.shape != gray.shape or keyframe_due:
+            return self._read_full(image, gray), 1.0
+
+        with span("tile_diff"):
+            regions = self.changed_regions(gray)
+        area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in regions)
+        if area > self.max_changed_fraction * height * width:
+            return self._read_full(image, gray), 1.0
+
+        if not regions:
+            return self.boxes, 0.0
+
+        new_boxes = []
+        with span("ocr_regions"):
+            for x0, y0, x1, y1 in regions:
+                new_boxes.extend(
+                    self._to_boxes(self.read(image.crop((x0, y0, x1, y1))), x0, y0, width, height)
+                )
+                self.reference[y0:y1, x0:x1] = gray[y0:y1, x0:x1]
+
+        kept = [
+            box for box in self.boxes if not any(_overlaps(region, box) for region in regions)
+        ]
+        self.boxes = reading_order(kept + new_boxes)
+        return self.boxes, area / (height * width)
+
+    def changed_regions(self, gray: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """
+        Returns:
+            list: Disjoint (x0, y0, x1, y1) pixel rectangles to re-read, covering every changed
+                tile with its margin and every cached text box they overlap.
+        """
+        height, width = gray.shape
+        size = self.tile_size
+        rows, cols = -(-height // size), -(-width // size)
+
+        changed = np.abs(gray - self.reference) > self.pixel_threshold
+        padded = np.zeros((rows * size, cols * size), dtype=bool)
+        padded[:height, :width] = changed
+        tiles = padded.reshape(rows, size, cols, size).sum(axis=(1, 3)) >= self.min_changed_pixels
+
+        regions = [
+            (c0 * size, r0 * size, min(c1 * size, width), min(r1 * size, height))
+            for r0, c0, r1, c1 in _tile_components(_dilate(tiles, self.margin))
+        ]
+        return _cover_boxes(regions, self.boxes)
+
+    def _read_full(self, image: Image.Image, gray: np.ndarray) -> List[TextBox]:
+        height, width = gray.shape
+        with span("ocr_full_frame"):
+            self.boxes = self._to_boxes(self.read(image), 0, 0, width, height)
+        self.reference = gray.copy()
+        self.frames_since_keyframe = 0
+        return self.boxes
+
+    @staticmethod
+    def _to_boxes(results: list, x_offset: int, y_offset: int, width: int, height: int) -> List[TextBox]:
+        boxes = []
+        for polygon, text, score in results or []:
+            xs = [point[0] for point in polygon]
+            ys = [point[1] for point in polygon]
+            boxes.append(
+                TextBox(
+                    max(0, int(np.floor(min(xs))) + x_offset),
+                    max(0, int(np.floor(min(ys))) + y_offset),
+                    min(width, int(np.ceil(max(xs))) + x_offset),
+                    min(height, int(np.ceil(max(ys))) + y_offset),
+                    text,
+                    float(score),
+                )
+            )
+        return boxes
+
+
+def reading_order(boxes: List[TextBox], line_tolerance: int = 10) -> List[TextBox]:
+    """Sort boxes top to bottom, and left to right within a line, like RapidOCR orders its own."""
+    boxes = sorted(boxes, key=lambda box: (box.y0, box.x0))
+    for i in range(len(boxes) - 1):
+        for j in range(i, -1, -1):
+            if abs(boxes[j + 1].y0 - boxes[j].y0) < line_tolerance and boxes[j + 1].x0 < boxes[j].x0:
+                boxes[j], boxes[j + 1] = boxes[j + 1], boxes[j]
+            else:
+                break
+    return boxes
+
+
+def _dilate(mask: np.ndarray, steps: int) -> np.ndarray:
+    for _ in range(steps):
+        grown = mask.copy()
+        grown[1:] |= mask[:-1]
+        grown[:-1] |= mask[1:]
+        grown[:, 1:] |= mask[:, :-1]
+        grown[:, :-1] |= mask[:, 1:]
+        mask = grown
+    return mask
+
+
+def _tile_components(mask: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """(row0, col0, row1, col1) bounds of the 8-connected components of a tile mask, ends exclusive."""
+    rows, cols = mask.shape
+    seen = np.zeros_like(mask)
+    components = []
+    for row, col in zip(*np.nonzero(mask)):
+        if seen[row, col]:
+            continue
+        seen[row, col] = True
+        stack = [(row, col)]
+        r0, c0, r1, c1 = row, col, row, col
+        while stack:
+            r, c = stack.pop()
+            r0, c0, r1, c1 = min(r0, r), min(c0, c), max(r1, r), max(c1, c)
+            for nr in range(max(0, r - 1), min(rows, r + 2)):
+                for nc in range(max(0, c - 1), min(cols, c + 2)):
+                    if mask[nr, nc] and not seen[nr, nc]:
+                        seen[nr, nc] = True
+                        stack.append((nr, nc))
+        components.append((int(r0), int(c0), int(r1) + 1, int(c1) + 1))
+    return components
+
+
+def _overlaps(a: tuple, b: tuple) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _union(a: tuple, b: tuple) -> Tuple[int, int, int, int]:
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _cover_boxes(regions: list, boxes: List[TextBox]) -> List[Tuple[int, int, int, int]]:
+    """Grow the regions over the boxes they cut through and merge overlapping ones, until neither changes."""
+    changed = True
+    while changed:
+        changed = False
+        for i, region in enumerate(regions):
+            for box in boxes:
+                if _overlaps(region, box) and _union(region, box) != region:
+                    region = _union(region, box)
+                    changed = True
+            regions[i] = region
+
+        merged = []
+        for region in regions:
+            for k, other in enumerate(merged):
+                if _overlaps(region, other):
+                    merged[k] = _union(region, other)
+                    changed = True
+                    break
+            else:
+                merged.append(region)
+        regions = merged
+    return [tuple(region[:4]) for region in regions]
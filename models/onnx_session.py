@@ -0,0 +1,149 @@
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+EXECUTION_MODES = {
+    "sequential": "ORT_SEQUENTIAL",
+    "parallel": "ORT_PARALLEL",
+}
+
+
+class OrtSessionConfig:
+    """
+    ONNX Runtime session options of a local engine.
+
+    Settings left as None keep the engine's own choice; RapidOCR creates its sessions
+    with all graph optimizations, sequential execution, the CPU memory arena disabled
+    and onnxruntime's default thread counts.
+    """
+
+    def __init__(
+        self,
+        intra_op_threads: int = None,
+        inter_op_threads: int = None,
+        graph_optimization: str = None,
+        execution_mode: str = None,
+        cpu_mem_arena: bool = None,
+    ):
+        """
+        Args:
+            intra_op_threads (int): Threads running a single operator.
+            inter_op_threads (int): Threads running independent operators, only used in parallel execution mode.
+            graph_optimization (str): One of disable, basic, extended or all.
+            execution_mode (str): sequential or parallel.
+            cpu_mem_arena (bool): Let the CPU allocator keep a growing memory arena.
+        """
+        if graph_optimization is not None and graph_optimization not in GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(
+                f"Unknown graph optimization level: {graph_optimization}. "
+                f"Available levels: {list(GRAPH_OPTIMIZATION_LEVELS)}"
+            )
+        if execution_mode is not None and execution_mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Unknown execution mode: {execution_mode}. Available modes: {list(EXECUTION_MODES)}"
+            )
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.graph_optimization = graph_optimization
+        self.execution_mode = execution_mode
+        self.cpu_mem_arena = cpu_mem_arena
+
+    def settings(self) -> dict:
+        return {
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+            "graph_optimization": self.graph_optimization,
+            "execution_mode": self.execution_mode,
+            "cpu_mem_arena": self.cpu_mem_arena,
+        }
+
+    @property
+    def is_default(self) -> bool:
+        return all(value is None for value in self.settings().values())
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, OrtSessionConfig) and self.settings() == other.settings()
+
+    def __hash__(self) -> int:
+        return hash(tuple(self.settings().items()))
+
+    def session_options(self, base_options=None):
+        """
+        Returns:
+            onnxruntime.SessionOptions: base_options (or a new SessionOptions) with these settings applied.
+        """
+        import onnxruntime as ort
+
+        options = base_options or ort.SessionOptions()
+        if self.intra_op_threads is not None:
+            options.intra_op_num_threads = self.intra_op_threads
+        if self.inter_op_threads is not None:
+            options.inter_op_num_threads = self.inter_op_threads
+        if self.graph_optimization is not None:
+            options.graph_optimization_level = getattr(
+                ort.GraphOptimizationLevel, GRAPH_OPTIMIZATION_LEVELS[self.graph_optimization]
+            )
+        if self.execution_mode is not None:
+            options.execution_mode = getattr(
+                ort.ExecutionMode, EXECUTION_MODES[self.execution_mode]
+            )
+        if self.cpu_mem_arena is not None:
+            options.enable_cpu_mem_arena = self.cpu_mem_arena
+        return options
+
+    def apply(self, engine) -> int:
+        """
+        Recreate the InferenceSessions held by an engine's components with these settings.
+
+        Returns:
+            int: Number of sessions recreated.
+        """
+        import onnxruntime as ort
+
+        def base_options():
+            # the engine's own choices for whatever is left as None
+            options = ort.SessionOptions()
+            options.log_severity_level = 4
+            options.enable_cpu_mem_arena = False
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            return options
+
+        recreated = 0
+        for holder, name, session in _find_sessions(engine, ort.InferenceSession):
+            provider_options = session.get_provider_options()
+            model = session._model_path or session._model_bytes
+            setattr(
+                holder,
+                name,
+                ort.InferenceSession(
+                    model,
+                    sess_options=self.session_options(base_options()),
+                    providers=[
+                        (provider, provider_options.get(provider, {}))
+                        for provider in session.get_providers()
+                    ],
+                ),
+            )
+            recreated += 1
+        return recreated
+
+
+def _find_sessions(obj, session_type, depth: int = 3) -> list:
+    """(holder, attribute name, session) of every session_type instance reachable from obj's attributes."""
+    found = []
+    seen = set()
+
+    def visit(holder, level):
+        if id(holder) in seen or not hasattr(holder, "__dict__"):
+            return
+        seen.add(id(holder))
+        for name, value in vars(holder).items():
+            if isinstance(value, session_type):
+                found.append((holder, name, value))
+            elif level < depth:
+                visit(value, level + 1)
+
+    visit(obj, 0)
+    return found
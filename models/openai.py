@@ -1,63 +1,122 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import time
 
 from .base_model import BaseModel
+from .tracing import span
 
 class Openai(BaseModel):
 
-    def __init__(self,  model_name: str, api_key: str):
-         
+    provider = "openai"
+
+    def __init__(self,  model_name: str, api_key: str, base_url: str = None):
+
         super().__init__(model_name, api_key)
-        self.client = OpenAI(api_key=api_key)
+        self.base_url = base_url
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
         self.model_name = model_name
-        
-        
-    def describe(self, frame_urls, prompt):
-        
-        
-        base64_images = [self.encode_image(url) for url in frame_urls]
-        
-        try:
-            
-            content_parts = [{"type": "text", "text": prompt}]
-            content_parts.extend(
-                [
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}",
-                            "detail": "high",
-                        },
-                    }
-                    for base64_image in base64_images
-                ]
-            )
-            messages = [
+
+
+    def create_async_client(self):
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+
+
+    @staticmethod
+    def extract_usage(response) -> dict | None:
+        if response.usage is None:
+            return None
+        return {
+            "input_tokens": response.usage.prompt_tokens,
+            "output_tokens": response.usage.completion_tokens,
+        }
+
+
+    def build_messages(self, base64_images: list, prompt: str) -> list:
+        content_parts = [{"type": "text", "text": prompt}]
+        content_parts.extend(
+            [
                 {
-                    "role": "user",
-                    "content": content_parts,
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:{self.image_preprocessor.mime_type};base64,{base64_image}",
+                        "detail": "high",
+                    },
                 }
+                for base64_image in base64_images
             ]
-    
-    
+        )
+        return [
+            {
+                "role": "user",
+                "content": content_parts,
+            }
+        ]
+
+
+    def describe(self, frame_urls, prompt):
+
+
+        base64_images = [self.encode_image(url) for url in frame_urls]
+
+        try:
+
+            with span("request_build"):
+                messages = self.build_messages(base64_images, prompt)
+
+
             start_time = time.time()
-            
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages
-            )
-            
+
+            with span("request"):
+                response = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages
+                )
+
             end_time = time.time()
 
-            out_text = response.choices[0].message.content.strip()
+            with span("postprocess"):
+                out_text = response.choices[0].message.content.strip()
 
             processing_time = end_time - start_time
 
-            return processing_time, out_text
-        
+            usage = self.request_usage(base64_images, self.extract_usage(response))
+
+            return processing_time, out_text, usage
+
         except Exception as e:
             print(f"Error in OPENAI VLM: {e}")
             return None
-        
 
 
+    async def describe_async(self, frame_urls, prompt):
+
+
+        base64_images = await self.encode_images_async(frame_urls)
+
+        try:
+
+            with span("request_build"):
+                messages = self.build_messages(base64_images, prompt)
+
+
+            start_time = time.time()
+
+            with span("request"):
+                response = await self.get_async_client().chat.completions.create(
+                    model=self.model_name,
+                    messages=messages
+                )
+
+            end_time = time.time()
+
+            with span("postprocess"):
+                out_text = response.choices[0].message.content.strip()
+
+            processing_time = end_time - start_time
+
+            usage = self.request_usage(base64_images, self.extract_usage(response))
+
+            return processing_time, out_text, usage
+
+        except Exception as e:
+            print(f"Error in OPENAI VLM: {e}")
+            return None
@@ -0,0 +1,132 @@
+import base64
+from io import BytesIO
+
+from PIL import Image
+
+from .tracing import span
+
+
+# format name -> (PIL format, MIME type)
+IMAGE_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+    "png": ("PNG", "image/png"),
+}
+JPEG_MAGIC = b"\xff\xd8\xff"
+
+
+class ImagePreprocessor:
+    """
+    Turns raw frame bytes into the base64 image payload sent to the VLM APIs.
+
+    The defaults re-encode every frame as a full resolution JPEG at PIL's default
+    quality. Frames can be shrunk to a maximum side, converted to grayscale and
+    encoded as JPEG, WebP or PNG at a chosen quality. With passthrough, frames that
+    already are JPEG and need no other change are sent as they are, without decoding.
+    """
+
+    def __init__(
+        self,
+        image_format: str = "jpeg",
+        quality: int = None,
+        max_side: int = None,
+        grayscale: bool = False,
+        passthrough: bool = False,
+    ):
+        """
+        Args:
+            image_format (str): One of jpeg, webp or png.
+            quality (int): Encoder quality for jpeg and webp, the PIL default when None.
+            max_side (int): Downscale frames whose longer side exceeds it, keeping the aspect ratio.
+            grayscale (bool): Convert frames to a single luminance channel.
+            passthrough (bool): Send JPEG frames as they are when no resize, grayscale or quality change applies.
+        """
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(
+                f"Unknown image format: {image_format}. Available formats: {list(IMAGE_FORMATS)}"
+            )
+        self.image_format = image_format
+        self.quality = quality
+        self.max_side = max_side
+        self.grayscale = grayscale
+        self.passthrough = passthrough
+
+    @property
+    def mime_type(self) -> str:
+        return IMAGE_FORMATS[self.image_format][1]
+
+    @property
+    def variant(self) -> str:
+        """Name of the encoded form, the frame cache and response cache keys depend on it."""
+        parts = [self.image_format]
+        if self.quality is not None:
+            parts.append(f"q{self.quality}")
+        if self.max_side is not None:
+            parts.append(f"s{self.max_side}")
+        if self.grayscale:
+            parts.append("gray")
+        if self.passthrough:
+            parts.append("passthrough")
+        return "-".join(parts) + ".b64"
+
+    @property
+    def is_default(self) -> bool:
+        return self.settings() == ImagePreprocessor().settings()
+
+    def settings(self) -> dict:
+        return {
+            "image_format": self.image_format,
+            "quality": self.quality,
+            "max_side": self.max_side,
+            "grayscale": self.grayscale,
+            "passthrough": self.passthrough,
+        }
+
+    def _can_pass_through(self, image_bytes: bytes) -> bool:
+        if not (
+            self.passthrough
+            and self.image_format == "jpeg"
+            and self.quality is None
+            and not self.grayscale
+            and bytes(image_bytes[:3]) == JPEG_MAGIC
+        ):
+            return False
+        if self.max_side is None:
+            return True
+        # only the header is parsed here, the pixels are not decoded
+        return max(Image.open(BytesIO(image_bytes)).size) <= self.max_side
+
+    def __call__(self, image_bytes: bytes) -> str:
+        """
+        Args:
+            image_bytes (bytes): Raw frame bytes.
+
+        Returns:
+            str: Base64 encoded image payload.
+        """
+        if not self._can_pass_through(image_bytes):
+            with span("decode"):
+                image = Image.open(BytesIO(image_bytes))
+                image.load()
+
+            if self.grayscale or self.max_side is not None:
+                with span("resize"):
+                    if self.grayscale:
+                        image = image.convert("L")
+                    if self.max_side is not None and max(image.size) > self.max_side:
+                        image.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+
+            pil_format = IMAGE_FORMATS[self.image_format][0]
+            if pil_format != "PNG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            with span("image_encode"):
+                buffered = BytesIO()
+                if self.quality is not None and pil_format != "PNG":
+                    image.save(buffered, format=pil_format, quality=self.quality)
+                else:
+                    image.save(buffered, format=pil_format)
+                image_bytes = buffered.getvalue()
+
+        with span("base64"):
+            return base64.b64encode(image_bytes).decode("utf-8")
@@ -1,18 +1,92 @@
 import time
+from functools import lru_cache
+
+import numpy as np
 from rapidocr_onnxruntime import RapidOCR
 
 from .base_model import BaseModel
+from .incremental import IncrementalOCR
+from .onnx_session import OrtSessionConfig
+from .tracing import span
+
+
+@lru_cache(maxsize=None)
+def load_engine(session_config: OrtSessionConfig = OrtSessionConfig()) -> RapidOCR:
+    """Load the RapidOCR engine (and its ONNX sessions) once per process and session config."""
+    if session_config.is_default:
+        return RapidOCR()
+
+    thread_kwargs = {}
+    if session_config.intra_op_threads is not None:
+        thread_kwargs["intra_op_num_threads"] = session_config.intra_op_threads
+    if session_config.inter_op_threads is not None:
+        thread_kwargs["inter_op_num_threads"] = session_config.inter_op_threads
+    engine = RapidOCR(**thread_kwargs)
+    # RapidOCR fixes the other session options, so its sessions are recreated with them
+    if session_config.apply(engine) == 0:
+        print("RapidOCR exposes no ONNX Runtime sessions, the session options are not applied")
+    return engine
+
 
 class Rapidocr(BaseModel):
 
-    def __init__(self,  model_name: str):
-         
+    def __init__(
+        self,
+        model_name: str,
+        num_threads: int = None,
+        intra_op_threads: int = None,
+        inter_op_threads: int = None,
+        graph_optimization: str = None,
+        execution_mode: str = None,
+        cpu_mem_arena: bool = None,
+        incremental: dict = None,
+    ):
+        """
+        Args:
+            model_name (str): Model name.
+            num_threads (int): Intra-op threads pinned by the worker pool when several engine processes share the machine.
+            intra_op_threads (int): ONNX Runtime intra-op threads, overrides num_threads.
+            inter_op_threads (int): ONNX Runtime inter-op threads, 1 when num_threads is pinned.
+            graph_optimization (str): ONNX Runtime graph optimization level (disable, basic, extended or all).
+            execution_mode (str): ONNX Runtime execution mode (sequential or parallel).
+            cpu_mem_arena (bool): Enable the CPU memory arena.
+            incremental (dict): IncrementalOCR settings to re-read only the changed regions of a
+                frame, None reads every frame in full.
+        """
         super().__init__(model_name,"")
         
         self.model_name = model_name
+        self.num_threads = num_threads
+        if intra_op_threads is None:
+            intra_op_threads = num_threads
+        if inter_op_threads is None and num_threads is not None:
+            inter_op_threads = 1
+        self.session_config = OrtSessionConfig(
+            intra_op_threads=intra_op_threads,
+            inter_op_threads=inter_op_threads,
+            graph_optimization=graph_optimization,
+            execution_mode=execution_mode,
+            cpu_mem_arena=cpu_mem_arena,
+        )
+        self.engine = None
+        self.incremental = (
+            IncrementalOCR(self.read_boxes, **incremental) if incremental is not None else None
+        )
         
         
-        
+    def warmup(self) -> float:
+        start_time = time.time()
+        self.engine = load_engine(self.session_config)
+        self.engine(np.full((64, 256, 3), 255, dtype=np.uint8))
+        return time.time() - start_time
+
+
+    def read_boxes(self, image) -> list:
+        """(polygon, text, score) of every text box RapidOCR finds in the image."""
+        results, _ = self.engine(image)
+        return results or []
+
+
     def describe(self, frame_urls, prompt):
         
         def extract_text_from_results(results):
@@ -45,20 +119,28 @@ class Rapidocr(BaseModel):
         
         images = [self.load_image(url) for url in frame_urls]     
           
-        model = RapidOCR()
+        if self.engine is None:
+            self.warmup()
         
         try:   
             
             start_time = time.time()
             
-            response = extract_text_from_results( model(images[0]) )
+            with span("inference"):
+                if self.incremental is not None:
+                    response, reprocessed_fraction = self.incremental(images[0])
+                else:
+                    response = extract_text_from_results( self.engine(images[0]) )
             end_time = time.time()
             
-            ocr_text = self.to_markdown(response)
-            cleaned_ocr_text = self.clean_ocr_text(ocr_text)
+            with span("postprocess"):
+                ocr_text = self.to_markdown(response)
+                cleaned_ocr_text = self.clean_ocr_text(ocr_text)
             
             processing_time = end_time - start_time
         
+            if self.incremental is not None:
+                return processing_time, cleaned_ocr_text, {"reprocessed_fraction": reprocessed_fraction}
             return processing_time, cleaned_ocr_text
         
         except Exception as e:
@@ -0,0 +1,141 @@
+import importlib
+import os
+from importlib.metadata import entry_points
+from typing import Dict, List, Type
+
+from .base_model import BaseModel
+
+
+# Entry point group third-party engines register under, e.g. in their pyproject.toml:
+#   [project.entry-points."ocr_benchmark.models"]
+#   paddleocr = "my_package.paddle:PaddleOcr"
+ENTRY_POINT_GROUP = "ocr_benchmark.models"
+
+
+class ModelSpec:
+    """
+    How to build a model, without importing it.
+
+    The class is given as "module:Class" and only imported when the model is
+    created, so selecting one model does not pull in the SDKs of the others.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        target: str,
+        group: str,
+        api_key_env: str = None,
+        base_url_env: str = None,
+        benchmark: bool = False,
+    ):
+        """
+        Args:
+            name (str): Model name selected with --model.
+            target (str): "module:Class" of the BaseModel subclass.
+            group (str): Provider group, also selectable with --model; its results go to <group>_results_dir.
+            api_key_env (str): Environment variable with the API key, None for local engines.
+            base_url_env (str): Environment variable overriding the API endpoint.
+            benchmark (bool): Part of --model benchmark.
+        """
+        self.name = name
+        self.target = target
+        self.group = group
+        self.api_key_env = api_key_env
+        self.base_url_env = base_url_env
+        self.benchmark = benchmark
+
+    def load(self) -> Type[BaseModel]:
+        module_name, _, class_name = self.target.partition(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
+    def create(self, **model_kwargs) -> BaseModel:
+        model_cls = self.load()
+        if self.api_key_env is None:
+            return model_cls(self.name, **model_kwargs)
+        base_url = os.getenv(self.base_url_env) if self.base_url_env else None
+        return model_cls(self.name, os.getenv(self.api_key_env), base_url)
+
+
+class ModelRegistry:
+    """Models selectable by name or group, including those registered through entry points."""
+
+    def __init__(self):
+        self._specs: Dict[str, ModelSpec] = {}
+        self._plugins_loaded = False
+
+    def register(self, spec: ModelSpec) -> None:
+        self._specs[spec.name] = spec
+
+    def _load_plugins(self) -> None:
+        if self._plugins_loaded:
+            return
+        self._plugins_loaded = True
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            # built-in models keep their name
+            if entry_point.name not in self._specs:
+                self.register(ModelSpec(entry_point.name, entry_point.value, group="ocr"))
+
+    def specs(self) -> List[ModelSpec]:
+        self._load_plugins()
+        return list(self._specs.values())
+
+    def names(self) -> List[str]:
+        return [spec.name for spec in self.specs()]
+
+    def groups(self) -> Dict[str, List[str]]:
+        groups = {}
+        for spec in self.specs():
+            groups.setdefault(spec.group, []).append(spec.name)
+        return groups
+
+    def get(self, model_name: str) -> ModelSpec:
+        self._load_plugins()
+        if model_name not in self._specs:
+            raise AttributeError(f"Model '{model_name}' is not implemented.")
+        return self._specs[model_name]
+
+    def resolve(self, selection: str) -> List[str]:
+        """
+        Returns:
+            List[str]: Names of the models selected by a model name, a group name, "all" or "benchmark".
+        """
+        selection = selection.lower()
+        if selection == "all":
+            return self.names()
+        if selection == "benchmark":
+            return [spec.name for spec in self.specs() if spec.benchmark]
+        groups = self.groups()
+        if selection in groups:
+            return groups[selection]
+        return [name for name in self.names() if name.lower() == selection]
+
+    def create(self, model_name: str, **model_kwargs) -> BaseModel:
+        return self.get(model_name).create(**model_kwargs)
+
+
+MODEL_REGISTRY = ModelRegistry()
+
+for _spec in (
+    ModelSpec("gpt-4o", "models.openai:Openai", "openai", "OPENAI_API_KEY", "OPENAI_BASE_URL", benchmark=True),
+    ModelSpec("gpt-4o-mini", "models.openai:Openai", "openai", "OPENAI_API_KEY", "OPENAI_BASE_URL"),
+    ModelSpec("chatgpt-4o-latest", "models.openai:Openai", "openai", "OPENAI_API_KEY", "OPENAI_BASE_URL"),
+    ModelSpec("gpt-4-turbo", "models.openai:Openai", "openai", "OPENAI_API_KEY", "OPENAI_BASE_URL"),
+    ModelSpec(
+        "claude-3-5-sonnet-latest",
+        "models.anthropic:Claude",
+        "anthropic",
+        "ANTHROPIC_API_KEY",
+        "ANTHROPIC_BASE_URL",
+        benchmark=True,
+    ),
+    ModelSpec("gemini-1.5-flash", "models.google:Gemini", "google", "GEMINI_API_KEY", "GEMINI_BASE_URL"),
+    ModelSpec("gemini-1.5-flash-8b", "models.google:Gemini", "google", "GEMINI_API_KEY", "GEMINI_BASE_URL"),
+    ModelSpec(
+        "gemini-1.5-pro", "models.google:Gemini", "google", "GEMINI_API_KEY", "GEMINI_BASE_URL", benchmark=True
+    ),
+    ModelSpec("moondream", "models.moondream:Moondream", "moondream", "MOONDREAM_API_KEY", "MOONDREAM_BASE_URL"),
+    ModelSpec("rapidocr", "models.rapidocr:Rapidocr", "ocr", benchmark=True),
+    ModelSpec("easyocr", "models.easyocr:Easyocr", "ocr", benchmark=True),
+):
+    MODEL_REGISTRY.register(_spec)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List
+
+
+CACHE_MODES = ("off", "read", "write", "readwrite")
+
+
+class ResponseCache:
+    """
+    Durable cache of model responses, keyed by (model name, prompt hash, frame content hashes
+    and the image preprocessing variant when it is not the default).
+
+    Stores the output text together with the latency and token usage of the
+    request that produced it, so re-evaluating a run does not re-query the models.
+    """
+
+    def __init__(self, path: str, mode: str = "readwrite"):
+        """
+        Args:
+            path (str): Path of the SQLite database.
+            mode (str): One of off, read, write or readwrite.
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}. Available modes: {list(CACHE_MODES)}")
+
+        self.mode = mode
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                model_name TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                image_hash TEXT NOT NULL,
+                output TEXT,
+                processing_time REAL,
+                usage TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model_name, prompt_hash, image_hash)
+            )
+            """
+        )
+        self._conn.commit()
+
+    @property
+    def reads(self) -> bool:
+        return self.mode in ("read", "readwrite")
+
+    @property
+    def writes(self) -> bool:
+        return self.mode in ("write", "readwrite")
+
+    @staticmethod
+    def prompt_hash(prompt: str) -> str:
+        return hashlib.sha256((prompt or "").encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def image_hash(frame_hashes: List[str], variant: str = None) -> str:
+        image_hash = ",".join(frame_hashes)
+        return f"{image_hash}@{variant}" if variant else image_hash
+
+    def get(
+        self, model_name: str, prompt: str, frame_hashes: List[str], variant: str = None
+    ) -> dict | None:
+        """
+        Returns:
+            dict | None: The cached model_output, processing_time and usage, None on a miss.
+        """
+        if not self.reads:
+            return None
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output, processing_time, usage FROM responses "
+                "WHERE model_name = ? AND prompt_hash = ? AND image_hash = ?",
+                (model_name, self.prompt_hash(prompt), self.image_hash(frame_hashes, variant)),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        output, processing_time, usage = row
+        return {
+            "model_output": output,
+            "processing_time": processing_time,
+            "usage": json.loads(usage) if usage else None,
+        }
+
+    def put(
+        self,
+        model_name: str,
+        prompt: str,
+        frame_hashes: List[str],
+        output: str,
+        processing_time: float,
+        usage: dict = None,
+        variant: str = None,
+    ) -> None:
+        if not self.writes:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(model_name, prompt_hash, image_hash, output, processing_time, usage, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    model_name,
+                    self.prompt_hash(prompt),
+                    self.image_hash(frame_hashes, variant),
+                    output,
+                    processing_time,
+                    json.dumps(usage) if usage else None,
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
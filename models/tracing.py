@@ -0,0 +1,161 @@
+import contextvars
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+
+# (model name, video id) spans are attributed to, set by OCR.run
+_context = contextvars.ContextVar("trace_context", default=(None, None))
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram.
+
+    Durations are recorded in microseconds into log-linear buckets: every power
+    of two is split into 2**SUB_BUCKET_BITS linear buckets, so percentiles are
+    accurate to about 1% at any scale while the histogram stays a few hundred
+    counters at most. Histograms merge by adding their counts.
+    """
+
+    SUB_BUCKET_BITS = 7
+
+    def __init__(self):
+        self.counts = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def _bucket(self, micros: int) -> int:
+        shift = max(0, micros.bit_length() - self.SUB_BUCKET_BITS)
+        return micros >> shift << shift
+
+    def _bucket_midpoint(self, bucket: int) -> float:
+        shift = max(0, bucket.bit_length() - self.SUB_BUCKET_BITS)
+        return bucket + ((1 << shift) - 1) / 2
+
+    def record(self, seconds: float) -> None:
+        self.counts[self._bucket(max(0, int(seconds * 1e6)))] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """
+        Args:
+            p (float): Percentile between 0 and 100.
+
+        Returns:
+            float: Duration in seconds, 0.0 for an empty histogram.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self._bucket_midpoint(bucket) / 1e6, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "counts": {str(bucket): n for bucket, n in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.counts = Counter({int(bucket): n for bucket, n in data["counts"].items()})
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.max = data["max"]
+        return histogram
+
+
+class Tracer:
+    """
+    Collects span durations into one LatencyHistogram per (model, video, stage).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = defaultdict(LatencyHistogram)
+
+    def record(self, stage: str, seconds: float) -> None:
+        model_name, video_id = _context.get()
+        # spans outside of a model run (e.g. the shared prefetch of --pipeline) are not attributed
+        if model_name is None:
+            return
+        with self._lock:
+            self._histograms[(model_name, video_id, stage)].record(seconds)
+
+    def pop(self, model_name: str, video_id: str) -> Dict[str, LatencyHistogram]:
+        """
+        Remove and return the histograms of a video, keyed by stage.
+        """
+        with self._lock:
+            keys = [key for key in self._histograms if key[:2] == (model_name, video_id)]
+            return {key[2]: self._histograms.pop(key) for key in keys}
+
+    def drain(self) -> List[Tuple[tuple, dict]]:
+        """Remove and return every histogram in a picklable form, see merge."""
+        with self._lock:
+            histograms, self._histograms = self._histograms, defaultdict(LatencyHistogram)
+        return [(key, histogram.to_dict()) for key, histogram in histograms.items()]
+
+    def merge(self, drained: List[Tuple[tuple, dict]]) -> None:
+        """Add histograms drained from another tracer, e.g. one of a worker process."""
+        with self._lock:
+            for key, data in drained:
+                self._histograms[tuple(key)].merge(LatencyHistogram.from_dict(data))
+
+
+# Process wide tracer every span is recorded into
+TRACER = Tracer()
+
+
+@contextmanager
+def trace_context(model_name: str, video_id: str):
+    """Attribute the spans of the block (and of the tasks and threads it spawns) to a model and video."""
+    token = _context.set((model_name, video_id))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def get_trace_context() -> tuple:
+    return _context.get()
+
+
+@contextmanager
+def span(stage: str):
+    """Time the block and record it as a stage of the current model and video."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        TRACER.record(stage, time.perf_counter() - start_time)
@@ -0,0 +1,258 @@
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .frame_pack import PackedFrame, PackedScene, PackedVideo
+from .tracing import span
+
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".avi", ".webm")
+# frame urls of local videos are video://<video id>/<timestamp>
+URL_SCHEME = "video://"
+
+
+def iter_video_frames(
+    path: str, fps: float = 1.0, start: float = 0.0
+) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    Decode a video with OpenCV, yielding (timestamp, RGB frame) every 1/fps seconds from start.
+
+    Frames between two samples are grabbed but not retrieved, so they are never
+    converted or copied out of the decoder.
+    """
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video {path}")
+    try:
+        video_fps = capture.get(cv2.CAP_PROP_FPS) or fps
+        sample = math.ceil(start * fps - 1e-9)
+        index = round(sample / fps * video_fps)
+        if index > 0:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+
+        while True:
+            with span("decode"):
+                target = round(sample / fps * video_fps)
+                while index < target:
+                    if not capture.grab():
+                        return
+                    index += 1
+                ok, frame = capture.read()
+                if not ok:
+                    return
+                index += 1
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            yield round(sample / fps, 3), frame
+            sample += 1
+    finally:
+        capture.release()
+
+
+def video_timestamps(path: str, fps: float = 1.0) -> List[float]:
+    """Timestamps iter_video_frames samples from a video, read from its metadata without decoding it."""
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open video {path}")
+    try:
+        video_fps = capture.get(cv2.CAP_PROP_FPS) or fps
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        capture.release()
+
+    timestamps = []
+    sample = 0
+    while round(sample / fps * video_fps) < frame_count:
+        timestamps.append(round(sample / fps, 3))
+        sample += 1
+    return timestamps
+
+
+class VideoFrameReader:
+    """
+    Frames of one video by timestamp, decoded by streaming through it.
+
+    Requests in increasing order continue the running decode; going back restarts it
+    from the requested timestamp. The last buffer_frames frames are kept, so frames a
+    deduplication or sampling pass just decoded are not decoded again right after.
+    Threads reading the same video take turns on its decoder.
+    """
+
+    def __init__(self, path: str, fps: float = 1.0, buffer_frames: int = 32):
+        self.path = path
+        self.fps = fps
+        self.buffer_frames = buffer_frames
+        self._frames = None
+        self._position = None
+        self._buffer: "OrderedDict[float, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, timestamp: float) -> np.ndarray:
+        with self._lock:
+            return self._get(timestamp)
+
+    def _get(self, timestamp: float) -> np.ndarray:
+        frame = self._buffer.get(timestamp)
+        if frame is not None:
+            self._buffer.move_to_end(timestamp)
+            return frame
+
+        if self._frames is None or timestamp <= self._position:
+            self._frames = iter_video_frames(self.path, self.fps, start=timestamp)
+        for frame_timestamp, frame in self._frames:
+            self._position = frame_timestamp
+            self._buffer[frame_timestamp] = frame
+            if len(self._buffer) > self.buffer_frames:
+                self._buffer.popitem(last=False)
+            if frame_timestamp >= timestamp:
+                return frame
+
+        self._frames = None
+        raise KeyError(f"{self.path} has no frame at {timestamp}s")
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._frames is not None:
+            self._frames.close()
+            self._frames = None
+        self._buffer.clear()
+
+
+class LocalVideoSource:
+    """
+    Videos of a local directory, sampled at a fixed fps, read like a frame pack.
+
+    Every video file becomes a video whose id is its file name without extension,
+    with one scene of one frame every 1/fps seconds. The local engines get the decoded
+    frames as they are (get_array); only the API models, which need image bytes,
+    get them encoded as PNG (get). Decoders of the max_open_videos videos read last
+    are kept open.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fps: float = 1.0,
+        buffer_frames: int = 16,
+        max_open_videos: int = 4,
+    ):
+        """
+        Args:
+            directory (str): Directory holding the video files.
+            fps (float): Frames sampled per second of video.
+            buffer_frames (int): Decoded frames kept per open video.
+            max_open_videos (int): Videos whose decoder and decoded frames are kept.
+        """
+        self.path = directory
+        self.fps = fps
+        self.buffer_frames = buffer_frames
+        self.max_open_videos = max_open_videos
+        self._videos: Dict[str, str] = {
+            os.path.splitext(name)[0]: os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if name.lower().endswith(VIDEO_EXTENSIONS)
+        }
+        self._timestamps: Dict[str, List[float]] = {}
+        self._readers: "OrderedDict[str, VideoFrameReader]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        # worker processes open their own decoders
+        return (
+            LocalVideoSource,
+            (self.path, self.fps, self.buffer_frames, self.max_open_videos),
+        )
+
+    @staticmethod
+    def frame_url(video_id: str, timestamp: float) -> str:
+        return f"{URL_SCHEME}{video_id}/{timestamp:.3f}"
+
+    def _parse_url(self, url: str) -> Tuple[str, float] | None:
+        if not url.startswith(URL_SCHEME):
+            return None
+        video_id, _, timestamp = url[len(URL_SCHEME):].rpartition("/")
+        if video_id not in self._videos:
+            return None
+        return video_id, round(float(timestamp), 3)
+
+    def __contains__(self, url: str) -> bool:
+        return self._parse_url(url) is not None
+
+    def get_array(self, url: str) -> np.ndarray:
+        """Decoded RGB frame of a frame url."""
+        video_id, timestamp = self._parse_url(url)
+        with self._lock:
+            if video_id not in self._readers:
+                self._readers[video_id] = VideoFrameReader(
+                    self._videos[video_id], self.fps, self.buffer_frames
+                )
+                if len(self._readers) > self.max_open_videos:
+                    self._readers.popitem(last=False)[1].close()
+            self._readers.move_to_end(video_id)
+            reader = self._readers[video_id]
+        return reader.get(timestamp)
+
+    def get(self, url: str) -> bytes | None:
+        if url not in self:
+            return None
+        frame = self.get_array(url)
+        with span("encode"):
+            buffer = BytesIO()
+            Image.fromarray(frame).save(buffer, format="PNG")
+            return buffer.getvalue()
+
+    def content_hash(self, url: str) -> str | None:
+        if url not in self:
+            return None
+        frame = self.get_array(url)
+        digest = hashlib.sha256(str(frame.shape).encode("utf-8"))
+        digest.update(np.ascontiguousarray(frame).data)
+        return digest.hexdigest()
+
+    def ground_truth_path(self, video_id: str) -> str:
+        return os.path.join(self.path, f"{video_id}_ground_truth.json")
+
+    def get_videos(self, video_ids: List[str] = None) -> List[PackedVideo]:
+        if video_ids:
+            video_ids = [video_id for video_id in video_ids if video_id in self._videos]
+        else:
+            video_ids = list(self._videos)
+
+        videos = []
+        for video_id in video_ids:
+            if video_id not in self._timestamps:
+                self._timestamps[video_id] = video_timestamps(self._videos[video_id], self.fps)
+            videos.append(
+                PackedVideo(
+                    video_id,
+                    video_id,
+                    [
+                        PackedScene(
+                            timestamp,
+                            round(timestamp + 1 / self.fps, 3),
+                            [PackedFrame(self.frame_url(video_id, timestamp))],
+                        )
+                        for timestamp in self._timestamps[video_id]
+                    ],
+                )
+            )
+        return videos
+
+    def close(self) -> None:
+        with self._lock:
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Type
+
+from .base_model import BaseModel
+from .frame_cache import FrameCache
+from .frame_pack import FramePack
+from .http_client import configure_http, http_settings
+from .tracing import TRACER, get_trace_context, span, trace_context
+from .video_source import LocalVideoSource
+
+# Math libraries whose thread pools are sized from the environment when they are imported
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# Per-process state of a pool worker
+_worker_model = None
+
+
+@contextmanager
+def _thread_env(num_threads: int):
+    """Set the thread count variables while spawning workers, which start with a copy of the environment."""
+    previous = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    os.environ.update({var: str(num_threads) for var in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for var, value in previous.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _init_worker(
+    model_cls: Type[BaseModel],
+    model_name: str,
+    model_kwargs: dict,
+    frame_cache_args: tuple,
+    frame_pack: FramePack | LocalVideoSource,
+    http_args: dict,
+    num_threads: int,
+    ready: "multiprocessing.Queue",
+) -> None:
+    global _worker_model
+
+    if frame_cache_args is not None:
+        BaseModel.frame_cache = FrameCache(*frame_cache_args)
+    # FramePack and LocalVideoSource pickle as their path, each worker opens its own
+    BaseModel.frame_pack = frame_pack
+    configure_http(**http_args)
+
+    # the initializer runs exactly once per process, so every worker reports in once
+    try:
+        _worker_model = model_cls(model_name, num_threads=num_threads, **model_kwargs)
+        ready.put((_worker_model.warmup(), None))
+    except Exception as e:
+        ready.put((None, f"{type(e).__name__}: {e}"))
+        raise
+
+
+def _worker_describe(job: tuple) -> tuple:
+    frame_urls, prompt, context = job
+    result, error = None, None
+    try:
+        with trace_context(*context), span("scene"):
+            result = _worker_model.describe(frame_urls, prompt)
+    except Exception as e:
+        # returned rather than raised, a raising job would end the pool's result iterator
+        error = f"{type(e).__name__}: {e}"
+    # hand the spans of the job back to the parent's tracer
+    return result, error, TRACER.drain()
+
+
+class LocalEnginePool:
+    """
+    Runs a local OCR engine in several processes.
+
+    Every worker loads and warms up the engine once, in the pool initializer, pulls
+    frames from the pool's shared task queue and returns (processing_time, text) for
+    each of them. The pool is ready once every worker reported its warm-up, and
+    warmup_time is the wall time until then. The spans traced in the workers are
+    merged into the parent's tracer.
+    """
+
+    def __init__(
+        self,
+        model_cls: Type[BaseModel],
+        model_name: str,
+        workers: int,
+        model_kwargs: dict = None,
+    ):
+        self.workers = workers
+        self.num_threads = max(1, (os.cpu_count() or 1) // workers)
+
+        frame_cache = BaseModel.frame_cache
+        frame_cache_args = (
+            (frame_cache.cache_dir, frame_cache.max_bytes, 0, frame_cache.store_raw)
+            if frame_cache is not None
+            else None
+        )
+
+        context = multiprocessing.get_context("spawn")
+        ready = context.Queue()
+        start_time = time.time()
+        # Pin math library threads so the workers together don't oversubscribe the cores. The
+        # workers inherit it from the environment, before unpickling model_cls imports torch or
+        # onnxruntime and numpy sizes its BLAS pool
+        with _thread_env(self.num_threads):
+            self.pool = context.Pool(
+                workers,
+                initializer=_init_worker,
+                initargs=(
+                    model_cls,
+                    model_name,
+                    model_kwargs or {},
+                    frame_cache_args,
+                    BaseModel.frame_pack,
+                    http_settings(),
+                    self.num_threads,
+                    ready,
+                ),
+            )
+        # block until every worker has loaded its engine
+        self.worker_warmup_times = []
+        for _ in range(workers):
+            warmup_time, error = ready.get()
+            if error is not None:
+                self.pool.terminate()
+                raise RuntimeError(f"A {model_name} worker failed to start: {error}")
+            self.worker_warmup_times.append(warmup_time)
+        self.warmup_time = time.time() - start_time
+
+    def imap(self, scene_frame_urls: List[List[str]], prompt: str) -> Iterator[tuple]:
+        """
+        Describe the scenes in the worker processes, yielding (result, error) in scene order.
+
+        A scene that raised yields (None, its error message) and the scenes after it
+        are still described.
+        """
+        context = get_trace_context()
+        for result, error, spans in self.pool.imap(
+            _worker_describe,
+            [(frame_urls, prompt, context) for frame_urls in scene_frame_urls],
+            chunksize=1,
+        ):
+            TRACER.merge(spans)
+            yield result, error
+
+    def close(self) -> None:
+        self.pool.close()
+        self.pool.join()
@@ -0,0 +1,138 @@
+"""
+Re-score saved model outputs with the current metrics.
+
+The outputs of every finished video of the matching runs (<video_id>_output.jsonl,
+or <video_id>_output.json of older runs) are evaluated again against the ground
+truth, the evaluations are rewritten, also into the results store (which imports
+runs made before it existed), and the run summaries regenerated.
+No model is queried. Identical (ground truth, output) pairs are scored once
+across all runs and models.
+"""
+
+import argparse
+import json
+import os
+import time
+
+from results_store import ResultsStore
+from tasks import get_task
+from utils import save_summary, update_run_stats, video_categories
+
+
+RESULTS_DIR = "ocr_results"
+OUTPUT_SUFFIXES = ("_output.jsonl", "_output.json")
+
+
+def get_args_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser("Re-score OCR benchmark runs", add_help=False)
+    parser.add_argument(
+        "--run",
+        default="",
+        type=str,
+        help="Run name (or part of it) to re-score, every run by default",
+    )
+    parser.add_argument(
+        "--ground_truth_dir",
+        default=None,
+        type=str,
+        help="Directory of the <video_id>_ground_truth.json files, e.g. the video directory of a videos:<dir> run (config.OCR_GROUND_TRUTH_DIR when not set)",
+    )
+    return parser
+
+
+def load_outputs(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as file:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in file if line.strip()]
+        return json.load(file)
+
+
+def find_runs(results_dir: str, run_id: str) -> list:
+    runs = []
+    for model_result in sorted(os.listdir(results_dir)):
+        for model in sorted(os.listdir(os.path.join(results_dir, model_result))):
+            model_dir = os.path.join(results_dir, model_result, model)
+            for run in sorted(os.listdir(model_dir)):
+                if run_id in run and os.path.isdir(os.path.join(model_dir, run)):
+                    runs.append(os.path.join(model_dir, run))
+    return runs
+
+
+def main(args):
+    task, config = get_task("ocr")
+    processor = task(match_tolerance=config.SCENE_MATCH_TOLERANCE)
+    results_store = ResultsStore(config.RESULTS_STORE_PATH)
+
+    ground_truths = {}
+    start_time = time.time()
+    total_frames = 0
+
+    runs = find_runs(RESULTS_DIR, args.run)
+    for run_dir in runs:
+        run = os.path.basename(run_dir)
+        model_name = os.path.basename(os.path.dirname(run_dir))
+        output_files = {}
+        for suffix in OUTPUT_SUFFIXES:
+            for output_file in sorted(os.listdir(run_dir)):
+                video_id = output_file[: -len(suffix)]
+                # streamed outputs of videos that have not finished yet are left to --resume
+                if output_file.endswith(suffix) and (
+                    suffix == "_output.json"
+                    or os.path.exists(os.path.join(run_dir, "evaluations", f"{video_id}.jsonl"))
+                ):
+                    output_files.setdefault(video_id, output_file)
+        if not output_files:
+            continue
+
+        os.makedirs(os.path.join(run_dir, "evaluations"), exist_ok=True)
+        unmatched_predictions = unmatched_ground_truth = 0
+        for video_id, output_file in output_files.items():
+            if video_id not in ground_truths:
+                gt_file = os.path.join(
+                    args.ground_truth_dir or config.OCR_GROUND_TRUTH_DIR,
+                    f"{video_id}_ground_truth.json",
+                )
+                with open(gt_file, "r", encoding="utf-8") as file:
+                    ground_truths[video_id] = json.load(file)
+
+            outputs = load_outputs(os.path.join(run_dir, output_file))
+
+            video_result = processor.evaluate(outputs, ground_truths[video_id])
+            total_frames += len(video_result)
+            unmatched_predictions += len(outputs) - len(video_result)
+            unmatched_ground_truth += len(ground_truths[video_id]) - len(video_result)
+
+            with open(os.path.join(run_dir, "evaluations", f"{video_id}.jsonl"), "w") as file:
+                for result in video_result:
+                    file.write(json.dumps(result) + "\n")
+            results_store.add_evaluations(run, model_name, video_id, video_result)
+
+        run_stats = update_run_stats(
+            run_dir,
+            unmatched_predictions=unmatched_predictions,
+            unmatched_ground_truth=unmatched_ground_truth,
+        )
+        results_store.set_run_stats(run, model_name, run_stats)
+
+    for run in sorted({os.path.basename(run_dir) for run_dir in runs}):
+        save_summary(
+            results_store,
+            run,
+            pricing=config.MODEL_PRICING,
+            categories=video_categories(config.VIDEO_IDS),
+        )
+    results_store.close()
+
+    print(
+        f"Re-scored {total_frames} frames of {len(runs)} runs "
+        f"in {time.time() - start_time:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Re-score OCR benchmark runs", parents=[get_args_parser()]
+    )
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,310 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from models.tracing import LatencyHistogram
+
+
+METRIC_COLUMNS = (
+    "COUNT(DISTINCT video_id) AS total_vids, "
+    "COUNT(*) AS total_frames, "
+    "AVG(cer) AS avg_cer, "
+    "AVG(wer) AS avg_wer, "
+    "AVG(accuracy) AS avg_acc, "
+    "AVG(order_agnostic_accuracy) AS avg_order_agnostic_acc, "
+    "AVG(processing_time) AS avg_processing_time, "
+    "AVG(input_tokens) AS avg_input_tokens, "
+    "AVG(output_tokens) AS avg_output_tokens, "
+    "SUM(input_tokens) AS total_input_tokens, "
+    "SUM(output_tokens) AS total_output_tokens, "
+    "AVG(payload_bytes) AS avg_payload_bytes, "
+    "AVG(reprocessed_fraction) AS avg_reprocessed_fraction, "
+    "SUM(described) AS frames_described"
+)
+
+EVALUATION_COLUMNS = (
+    "run",
+    "model",
+    "video_id",
+    "scene_start",
+    "scene_end",
+    "image",
+    "ground_truth",
+    "ocr",
+    "cer",
+    "wer",
+    "accuracy",
+    "order_agnostic_accuracy",
+    "processing_time",
+    "input_tokens",
+    "output_tokens",
+    "payload_bytes",
+    "reprocessed_fraction",
+    "described",
+)
+
+
+class ResultsStore:
+    """
+    SQLite store of the frame level evaluations, stage latency histograms and run
+    statistics of every run.
+
+    Rows are keyed by (run, model, video_id, scene_start) and indexed by model and
+    video, so summaries, per-video breakdowns and comparisons between runs are
+    queries over the rows of the requested runs only.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Path of the SQLite database.
+        """
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS evaluations (
+                run TEXT NOT NULL,
+                model TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                scene_start REAL NOT NULL,
+                scene_end REAL,
+                image TEXT,
+                ground_truth TEXT,
+                ocr TEXT,
+                cer REAL,
+                wer REAL,
+                accuracy REAL,
+                order_agnostic_accuracy REAL,
+                processing_time REAL,
+                input_tokens INTEGER,
+                output_tokens INTEGER,
+                payload_bytes INTEGER,
+                reprocessed_fraction REAL,
+                described INTEGER,
+                PRIMARY KEY (run, model, video_id, scene_start)
+            );
+            CREATE INDEX IF NOT EXISTS evaluations_model ON evaluations (model, run);
+            CREATE INDEX IF NOT EXISTS evaluations_video ON evaluations (video_id, run);
+            CREATE TABLE IF NOT EXISTS latency (
+                run TEXT NOT NULL,
+                model TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                histogram TEXT NOT NULL,
+                PRIMARY KEY (run, model, video_id, stage)
+            );
+            CREATE TABLE IF NOT EXISTS run_stats (
+                run TEXT NOT NULL,
+                model TEXT NOT NULL,
+                stats TEXT NOT NULL,
+                PRIMARY KEY (run, model)
+            );
+            """
+        )
+        # stores created by older versions lack the usage columns
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(evaluations)")}
+        for column, column_type in (
+            ("input_tokens", "INTEGER"),
+            ("output_tokens", "INTEGER"),
+            ("payload_bytes", "INTEGER"),
+            ("reprocessed_fraction", "REAL"),
+            ("described", "INTEGER"),
+        ):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE evaluations ADD COLUMN {column} {column_type}")
+        self._conn.commit()
+
+    def add_evaluations(self, run: str, model: str, video_id: str, results: List[Dict]) -> None:
+        """
+        Replace the evaluations of a video in a run with the output of OCR.evaluate.
+        """
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM evaluations WHERE run = ? AND model = ? AND video_id = ?",
+                (run, model, video_id),
+            )
+            self._insert_evaluations(run, model, video_id, results)
+            self._conn.commit()
+
+    def clear_evaluations(self, run: str, model: str, video_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM evaluations WHERE run = ? AND model = ? AND video_id = ?",
+                (run, model, video_id),
+            )
+            self._conn.commit()
+
+    def append_evaluations(self, run: str, model: str, video_id: str, results: List[Dict]) -> None:
+        """
+        Add evaluations of a video as they are scored, replacing stored ones of the same scenes.
+        """
+        with self._lock:
+            self._insert_evaluations(run, model, video_id, results)
+            self._conn.commit()
+
+    def _insert_evaluations(self, run: str, model: str, video_id: str, results: List[Dict]) -> None:
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO evaluations ({', '.join(EVALUATION_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(EVALUATION_COLUMNS))})",
+            [
+                (
+                    run,
+                    model,
+                    video_id,
+                    result["scene_start"],
+                    result["Scene_end"],
+                    # the frame urls of the scene
+                    json.dumps(result["image"]),
+                    result["ground_truth"],
+                    result["ocr"],
+                    result["cer"],
+                    result["wer"],
+                    result["accuracy"],
+                    result["order_agnostic_accuray"],
+                    result["processing_time"],
+                    result.get("input_tokens"),
+                    result.get("output_tokens"),
+                    result.get("payload_bytes"),
+                    result.get("reprocessed_fraction"),
+                    result.get("described"),
+                )
+                for result in results
+            ],
+        )
+
+    def add_latency(
+        self, run: str, model: str, video_id: str, histograms: Dict[str, LatencyHistogram]
+    ) -> None:
+        """
+        Merge the stage histograms of a video into the ones already stored, e.g. by an interrupted attempt.
+        """
+        with self._lock:
+            for stage, histogram in histograms.items():
+                row = self._conn.execute(
+                    "SELECT histogram FROM latency "
+                    "WHERE run = ? AND model = ? AND video_id = ? AND stage = ?",
+                    (run, model, video_id, stage),
+                ).fetchone()
+                if row is not None:
+                    stored = LatencyHistogram.from_dict(json.loads(row["histogram"]))
+                    stored.merge(histogram)
+                    histogram = stored
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO latency VALUES (?, ?, ?, ?, ?)",
+                    (run, model, video_id, stage, json.dumps(histogram.to_dict())),
+                )
+            self._conn.commit()
+
+    def get_latency(self, run: str) -> Dict[Tuple[str, str], Dict[str, LatencyHistogram]]:
+        """
+        Returns:
+            Dict[Tuple[str, str], Dict[str, LatencyHistogram]]: Stage histograms keyed by (model, video_id).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT model, video_id, stage, histogram FROM latency WHERE run = ?", (run,)
+            ).fetchall()
+
+        latency = defaultdict(dict)
+        for row in rows:
+            latency[(row["model"], row["video_id"])][row["stage"]] = LatencyHistogram.from_dict(
+                json.loads(row["histogram"])
+            )
+        return latency
+
+    def set_run_stats(self, run: str, model: str, stats: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_stats VALUES (?, ?, ?)",
+                (run, model, json.dumps(stats)),
+            )
+            self._conn.commit()
+
+    def get_run_stats(self, run: str) -> Dict[str, Dict]:
+        """
+        Returns:
+            Dict[str, Dict]: run_stats of every model of the run, keyed by model.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT model, stats FROM run_stats WHERE run = ?", (run,)
+            ).fetchall()
+        return {row["model"]: json.loads(row["stats"]) for row in rows}
+
+    def _query(self, sql: str, params: tuple) -> List[Dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def summary(self, run: str) -> List[Dict]:
+        """
+        Returns:
+            List[Dict]: Frame/video counts and average metrics of every model of the run.
+        """
+        return self._query(
+            f"SELECT model, {METRIC_COLUMNS} FROM evaluations WHERE run = ? "
+            "GROUP BY model ORDER BY model",
+            (run,),
+        )
+
+    def processing_times(self, run: str) -> Dict[str, List[float]]:
+        """
+        Returns:
+            Dict[str, List[float]]: processing_time of every frame of the run, keyed by model.
+        """
+        times = defaultdict(list)
+        for row in self._query(
+            "SELECT model, processing_time FROM evaluations WHERE run = ?", (run,)
+        ):
+            times[row["model"]].append(row["processing_time"])
+        return times
+
+    def video_breakdown(self, run: str, model: str = None) -> List[Dict]:
+        """
+        Returns:
+            List[Dict]: Frame count and average metrics per model and video of the run.
+        """
+        sql = f"SELECT model, video_id, {METRIC_COLUMNS} FROM evaluations WHERE run = ?"
+        params = (run,)
+        if model is not None:
+            sql += " AND model = ?"
+            params += (model,)
+        return self._query(sql + " GROUP BY model, video_id ORDER BY model, video_id", params)
+
+    def compare(self, run: str, reference_run: str) -> Dict[str, Dict]:
+        """
+        Compare two runs on the frames both of them scored.
+
+        Returns:
+            Dict[str, Dict]: Per model, the frame count and the accuracy/CER of both runs and their deltas.
+        """
+        rows = self._query(
+            "SELECT current.model AS model, COUNT(*) AS frames, "
+            "AVG(current.accuracy) AS acc, AVG(reference.accuracy) AS reference_acc, "
+            "AVG(current.cer) AS cer, AVG(reference.cer) AS reference_cer "
+            "FROM evaluations AS current JOIN evaluations AS reference "
+            "ON reference.run = ? AND reference.model = current.model "
+            "AND reference.video_id = current.video_id AND reference.scene_start = current.scene_start "
+            "WHERE current.run = ? GROUP BY current.model",
+            (reference_run, run),
+        )
+        return {
+            row["model"]: {
+                **row,
+                "acc_delta": row["acc"] - row["reference_acc"],
+                "cer_delta": row["cer"] - row["reference_cer"],
+            }
+            for row in rows
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,15 +1,42 @@
 import argparse
 import json
 import os
-import videodb
+import queue
+import time
 import yaml
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from tqdm import tqdm
 
-from utils import create_directories, setup_logging, save_summary
+from models import (
+    BaseModel,
+    FrameCache,
+    FramePack,
+    FramePrefetcher,
+    ImagePreprocessor,
+    IMAGE_FORMATS,
+    LocalVideoSource,
+    GRAPH_OPTIMIZATION_LEVELS,
+    EXECUTION_MODES,
+    MODEL_REGISTRY,
+    ResponseCache,
+    CACHE_MODES,
+    TRACER,
+    configure_http,
+)
+from utils import (
+    create_directories,
+    setup_logging,
+    save_summary,
+    video_categories,
+    update_run_stats,
+    load_run_stats,
+)
+from results_store import ResultsStore
 from tasks import get_task
+from tasks.evaluator import StreamingEvaluator
 
 
 def load_yaml_config(file_path: str) -> dict:
@@ -32,29 +59,438 @@ def get_args_parser() -> argparse.ArgumentParser:
         default="gpt-4o",
         type=str,
         nargs="+",
-        choices=[
-            "all",
-            "benchmark",
-            "openai",
-            "google",
-            "anthropic",
-            "gpt-4o",
-            "gpt-4o-mini",
-            "chatgpt-4o-latest",
-            "gpt-4-turbo",
-            "gemini-1.5-flash",
-            "gemini-1.5-flash-8b",
-            "claude-3-5-sonnet-latest",
-            "easyocr",
-            "rapidocr",
-        ],
+        choices=list(
+            dict.fromkeys(["all", "benchmark", *MODEL_REGISTRY.groups(), *MODEL_REGISTRY.names()])
+        ),
     )
 
     parser.add_argument("--num_vids", default=100, type=int)
+    parser.add_argument(
+        "--frame_cache_dir",
+        default=None,
+        type=str,
+        help="Directory of the on-disk frame cache (defaults to FRAME_CACHE_DIR in the config)",
+    )
+    parser.add_argument(
+        "--frame_cache_max_gb",
+        default=None,
+        type=float,
+        help="Size bound of the frame cache in GB, least recently used frames are evicted first",
+    )
+    parser.add_argument(
+        "--no_frame_cache",
+        action="store_true",
+        help="Download every frame directly instead of going through the frame cache",
+    )
+    parser.add_argument(
+        "--async_requests",
+        action="store_true",
+        help="Send requests to the API models concurrently, bounded per provider",
+    )
+    parser.add_argument(
+        "--max_in_flight",
+        default=None,
+        type=int,
+        help="Concurrent requests per provider with --async_requests (defaults to MAX_IN_FLIGHT in the config)",
+    )
+    parser.add_argument(
+        "--workers",
+        default=1,
+        type=int,
+        help="Number of processes running the local OCR engines (rapidocr, easyocr)",
+    )
+    parser.add_argument(
+        "--batch_size",
+        default=1,
+        type=int,
+        help="Number of scenes per batched inference call (EasyOCR uses readtext_batched)",
+    )
+    parser.add_argument(
+        "--easyocr_n_width",
+        default=None,
+        type=int,
+        help="Width frames are resized to in an EasyOCR batch",
+    )
+    parser.add_argument(
+        "--easyocr_n_height",
+        default=None,
+        type=int,
+        help="Height frames are resized to in an EasyOCR batch",
+    )
+    parser.add_argument(
+        "--ort_intra_op_threads",
+        default=None,
+        type=int,
+        help="ONNX Runtime intra-op threads of RapidOCR (cpu_count // workers with --workers, onnxruntime default otherwise)",
+    )
+    parser.add_argument(
+        "--ort_inter_op_threads",
+        default=None,
+        type=int,
+        help="ONNX Runtime inter-op threads of RapidOCR, used by the parallel execution mode",
+    )
+    parser.add_argument(
+        "--ort_graph_optimization",
+        default=None,
+        choices=list(GRAPH_OPTIMIZATION_LEVELS),
+        help="ONNX Runtime graph optimization level of RapidOCR (all when not set)",
+    )
+    parser.add_argument(
+        "--ort_execution_mode",
+        default=None,
+        choices=list(EXECUTION_MODES),
+        help="ONNX Runtime execution mode of RapidOCR (sequential when not set)",
+    )
+    parser.add_argument(
+        "--ort_cpu_mem_arena",
+        default=None,
+        choices=["on", "off"],
+        help="ONNX Runtime CPU memory arena of RapidOCR (off when not set)",
+    )
+    parser.add_argument(
+        "--incremental_ocr",
+        action="store_true",
+        help="Local engines re-read only the regions of a frame that changed since the previous frames",
+    )
+    parser.add_argument(
+        "--incremental_tile_size",
+        default=None,
+        type=int,
+        help="Side, in pixels, of the tiles frames are compared by (config.INCREMENTAL_TILE_SIZE when not set)",
+    )
+    parser.add_argument(
+        "--incremental_pixel_threshold",
+        default=None,
+        type=int,
+        help="Grayscale difference above which a pixel counts as changed (config.INCREMENTAL_PIXEL_THRESHOLD when not set)",
+    )
+    parser.add_argument(
+        "--incremental_max_changed_fraction",
+        default=None,
+        type=float,
+        help="Share of changed pixels above which the whole frame is read (config.INCREMENTAL_MAX_CHANGED_FRACTION when not set)",
+    )
+    parser.add_argument(
+        "--incremental_keyframe_interval",
+        default=None,
+        type=int,
+        help="Read the whole frame every this many frames, 0 never forces it (config.INCREMENTAL_KEYFRAME_INTERVAL when not set)",
+    )
+    parser.add_argument(
+        "--dedup_threshold",
+        default=None,
+        type=int,
+        help="Reuse the previous output for frames within this perceptual hash (Hamming) distance",
+    )
+    parser.add_argument(
+        "--dedup_hash_size",
+        default=8,
+        type=int,
+        help="Side of the perceptual hash used for deduplication (hash_size**2 bits)",
+    )
+    parser.add_argument(
+        "--adaptive_sampling",
+        action="store_true",
+        help="Only read scenes whose frames changed since the last read one, the others hold its output",
+    )
+    parser.add_argument(
+        "--sampling_change_threshold",
+        default=None,
+        type=float,
+        help="Share of changed thumbnail pixels from which a scene is read (config.SAMPLING_CHANGE_THRESHOLD when not set)",
+    )
+    parser.add_argument(
+        "--sampling_max_gap",
+        default=None,
+        type=float,
+        help="Seconds after which a scene is read even without a change, 0 never forces one (config.SAMPLING_MAX_GAP when not set)",
+    )
+    parser.add_argument(
+        "--reference_run",
+        default=None,
+        type=str,
+        help="Full run (e.g. ocr_2025-02-06_16-32-48) to report the accuracy delta against in the summary",
+    )
+    parser.add_argument(
+        "--cache_mode",
+        default="off",
+        choices=CACHE_MODES,
+        help="Serve model responses from (read), store them in (write) or both (readwrite) the response cache",
+    )
+    parser.add_argument(
+        "--response_cache_path",
+        default=None,
+        type=str,
+        help="SQLite file of the response cache (defaults to RESPONSE_CACHE_PATH in the config)",
+    )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        type=str,
+        help="Resume an interrupted run (e.g. ocr_2025-02-06_16-32-48), only missing scenes and videos are processed",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Fetch and decode every frame once and run all selected models concurrently on it",
+    )
+    parser.add_argument(
+        "--prefetch_videos",
+        default=2,
+        type=int,
+        help="With --pipeline, how many prepared videos a model may have queued ahead",
+    )
+    parser.add_argument(
+        "--dataset",
+        default="videodb",
+        type=str,
+        help="videodb to read videos and frames from VideoDB, local:<path> to read them from a frame pack made by snapshot_dataset.py, "
+        "or videos:<dir> to decode the video files of a directory with OpenCV",
+    )
+    parser.add_argument(
+        "--video_fps",
+        default=None,
+        type=float,
+        help="Frames sampled per second of video with --dataset videos:<dir> (config.VIDEO_SAMPLE_FPS when not set)",
+    )
+    parser.add_argument(
+        "--ground_truth_dir",
+        default=None,
+        type=str,
+        help="Directory of the <video_id>_ground_truth.json files (the video directory with --dataset videos:<dir>, config.OCR_GROUND_TRUTH_DIR otherwise)",
+    )
+    parser.add_argument(
+        "--frames_per_call",
+        default=1,
+        type=int,
+        help="Pack this many scenes into one API request, with a prompt asking for a JSON answer per image",
+    )
+    parser.add_argument(
+        "--run_name",
+        default=None,
+        type=str,
+        help="Name of the run, ocr_<timestamp> by default",
+    )
+    parser.add_argument(
+        "--image_format",
+        default="jpeg",
+        choices=list(IMAGE_FORMATS),
+        help="Format the frames are sent to the API models in",
+    )
+    parser.add_argument(
+        "--image_quality",
+        default=None,
+        type=int,
+        help="Encoder quality for jpeg and webp frames (PIL default when not set)",
+    )
+    parser.add_argument(
+        "--image_max_side",
+        default=None,
+        type=int,
+        help="Downscale frames sent to the API models so their longer side is at most this many pixels",
+    )
+    parser.add_argument(
+        "--image_grayscale",
+        action="store_true",
+        help="Send frames to the API models in grayscale",
+    )
+    parser.add_argument(
+        "--image_passthrough",
+        action="store_true",
+        help="Send frames that already are JPEG as they are when no resize, grayscale or quality change applies",
+    )
+    parser.add_argument(
+        "--http_timeout",
+        default=None,
+        type=float,
+        help="Timeout in seconds of a frame download (config.HTTP_TIMEOUT when not set)",
+    )
+    parser.add_argument(
+        "--http_retries",
+        default=None,
+        type=int,
+        help="Retries of a frame download on connection errors and 429/5xx responses (config.HTTP_RETRIES when not set)",
+    )
+    parser.add_argument(
+        "--http_pool_size",
+        default=None,
+        type=int,
+        help="Keep-alive connections kept open to the frame host (config.HTTP_POOL_SIZE when not set)",
+    )
+    parser.add_argument(
+        "--prefetch_frames",
+        default=None,
+        type=int,
+        help="Frames downloaded in the background ahead of the one being inferred, 0 disables it (config.PREFETCH_FRAMES when not set)",
+    )
 
     return parser
 
 
+def onnx_session_settings(processor, model_name: str, args) -> dict | None:
+    """ONNX Runtime session settings a model runs with, None for models without them."""
+    model = processor.get_model(model_name)
+    session_config = getattr(model, "session_config", None)
+    if session_config is None:
+        return None
+    settings = session_config.settings()
+    if processor.use_worker_pool(model):
+        # the workers pin their own intra-op threads
+        pool = processor.get_pool(model_name)
+        settings["intra_op_threads"] = args.ort_intra_op_threads or pool.num_threads
+        settings["inter_op_threads"] = (
+            args.ort_inter_op_threads if args.ort_inter_op_threads is not None else 1
+        )
+    return settings
+
+
+def store_latency(model_run: dict, model_name: str, video_id: str) -> None:
+    """Move the stage histograms traced for a video into the results store."""
+    model_run["results_store"].add_latency(
+        os.path.basename(model_run["current_run_dir"]),
+        model_name,
+        video_id,
+        TRACER.pop(model_name, video_id),
+    )
+
+
+def process_video(
+    processor, model_name: str, model_run: dict, video, config, video_scenes=None
+) -> None:
+    """
+    Run one model on one video, evaluating every output as soon as it is produced and
+    skipping whatever a resumed run already has.
+
+    Args:
+        processor: Task processor
+        model_name: Model to run
+        model_run: Logger, run directory, results store, ground truth directory and running totals of the model
+        video: VideoDB video
+        config: Task config
+        video_scenes: Scenes of the video if already extracted, fetched otherwise
+    """
+    logger = model_run["logger"]
+    current_run_dir = model_run["current_run_dir"]
+    run_name = os.path.basename(current_run_dir)
+    results_store = model_run["results_store"]
+
+    output_file = os.path.join(current_run_dir, f"{video.id}_output.jsonl")
+    eval_file = os.path.join(current_run_dir, "evaluations", f"{video.id}.jsonl")
+
+    legacy_eval_file = os.path.join(current_run_dir, "evaluations", f"{video.id}.json")
+    if os.path.exists(eval_file) or os.path.exists(legacy_eval_file):
+        logger.info(f"{video.id} already has outputs and evaluations, skipping it")
+        return
+
+    if video_scenes is None:
+        video_scenes = processor.get_scenes(video)
+
+    # ground truth is loaded up front so every output is scored as soon as it is produced
+    gt_file = os.path.join(
+        model_run["ground_truth_dir"], f"{video.id}_ground_truth.json"
+    )
+    with open(gt_file, "r", encoding='utf-8') as file:
+        video_ground_truth = json.load(file)
+
+    results_store.clear_evaluations(run_name, model_name, video.id)
+    evaluator = StreamingEvaluator(
+        processor.score_matched,
+        video_ground_truth,
+        processor.match_tolerance,
+        eval_file,
+        on_results=lambda results: results_store.append_evaluations(
+            run_name, model_name, video.id, results
+        ),
+    )
+
+    # outputs a resumed run already has are loaded from output_file and only evaluated
+    start_time = time.time()
+    num_outputs, num_produced = 0, 0
+    try:
+        num_outputs, num_produced = processor.run(
+            model_name,
+            video_scenes,
+            video.id,
+            checkpoint_path=output_file,
+            on_output=evaluator.add,
+        )
+    finally:
+        # the evaluation only becomes final once every scene has an output
+        evaluator.close(complete=num_outputs == len(video_scenes))
+    model_run["inference_wall_time"] += time.time() - start_time - evaluator.elapsed
+    # only the frames whose output took this wall time: neither failed nor loaded from the checkpoint
+    model_run["total_frames"] += num_produced
+    store_latency(model_run, model_name, video.id)
+
+    if num_outputs < len(video_scenes):
+        logger.info(
+            f"{len(video_scenes) - num_outputs} scenes of {video.id} failed, "
+            f"run with --resume {run_name} to retry them"
+        )
+        return
+
+    unmatched_predictions = evaluator.unmatched_predictions
+    unmatched_ground_truth = evaluator.unmatched_ground_truth
+    if unmatched_predictions or unmatched_ground_truth:
+        logger.info(
+            f"{video.id}: {unmatched_predictions} predictions and {unmatched_ground_truth} "
+            f"ground truth frames could not be matched and are not scored"
+        )
+    processor.counters[model_name]["unmatched_predictions"] += unmatched_predictions
+    processor.counters[model_name]["unmatched_ground_truth"] += unmatched_ground_truth
+
+    logger.info(
+        f"model results of {video.id} saved to {output_file}, "
+        f"{evaluator.scored} evaluations saved to {eval_file}"
+    )
+
+
+def run_pipeline(processor, videos, model_runs: dict, config, prefetch_videos: int) -> None:
+    """
+    Fetch-once fan-out: a producer extracts the scenes of each video and fetches, decodes
+    and encodes its frames once, then every model consumes the videos in its own thread.
+    Each model keeps its own concurrency lane, so wall-clock time approaches the slowest model.
+
+    Args:
+        processor: Task processor
+        videos: Videos to run
+        model_runs: Logger, run directory, results store and running totals per model
+        config: Task config
+        prefetch_videos: How many prepared videos a model may have queued
+    """
+    queues = {model_name: queue.Queue(maxsize=prefetch_videos) for model_name in model_runs}
+
+    def produce():
+        try:
+            for video in tqdm(videos, desc="Preparing videos", unit="video"):
+                video_scenes = processor.get_scenes(video)
+                processor.prefetch_frames(video_scenes, list(model_runs))
+                for model_queue in queues.values():
+                    model_queue.put((video, video_scenes))
+        finally:
+            for model_queue in queues.values():
+                model_queue.put(None)
+
+    def consume(model_name):
+        model_queue = queues[model_name]
+        try:
+            while (item := model_queue.get()) is not None:
+                video, video_scenes = item
+                process_video(
+                    processor, model_name, model_runs[model_name], video, config, video_scenes
+                )
+        finally:
+            # keep draining so the producer never blocks on a model that stopped
+            while item is not None:
+                item = model_queue.get()
+
+    with ThreadPoolExecutor(max_workers=len(model_runs) + 1) as executor:
+        futures = [executor.submit(produce)]
+        futures += [executor.submit(consume, model_name) for model_name in model_runs]
+        for future in futures:
+            future.result()
+
+
 def main(args):
     # get the task name and config
     task, config = get_task("ocr")
@@ -64,29 +500,188 @@ def main(args):
     args.anthropic_results_dir = config.ANTHROPIC_RESULTS_DIR
     args.google_results_dir = config.GOOGLE_RESULTS_DIR
     args.ocr_results_dir = config.OCR_RESULTS_DIR
+    args.moondream_results_dir = config.MOONDREAM_RESULTS_DIR
 
     args.openai_evaluation_dir = config.OPENAI_EVALUATION_DIR
     args.anthropic_evaluation_dir = config.ANTHROPIC_EVALUATION_DIR
     args.google_evaluation_dir = config.GOOGLE_EVALUATION_DIR
     args.ocr_evaluation_dir = config.OCR_EVALUATION_DIR
+    args.moondream_evaluation_dir = config.MOONDREAM_EVALUATION_DIR
 
     args.save_paths = create_directories(args)
 
-    current_run = f"ocr_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+    current_run = (
+        args.resume or args.run_name or f"ocr_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+    )
+
+    if args.pipeline and args.no_frame_cache:
+        print("--pipeline shares frames between the models through the frame cache, drop --no_frame_cache")
+        return
+
+    # local frame pack written by snapshot_dataset.py, or local video files decoded with OpenCV
+    frame_pack = None
+    video_dir = None
+    if args.dataset.startswith("local:"):
+        frame_pack = FramePack(args.dataset[len("local:"):])
+        BaseModel.frame_pack = frame_pack
+    elif args.dataset.startswith("videos:"):
+        video_dir = args.dataset[len("videos:"):]
+        frame_pack = LocalVideoSource(video_dir, args.video_fps or config.VIDEO_SAMPLE_FPS)
+        BaseModel.frame_pack = frame_pack
+    elif args.dataset != "videodb":
+        print(f"Unknown dataset {args.dataset}, use videodb, local:<path> or videos:<dir>")
+        return
+    ground_truth_dir = args.ground_truth_dir or video_dir or config.OCR_GROUND_TRUTH_DIR
+
+    # shared frame cache, so only the first fetch of a frame hits the network;
+    # frames of local videos are decoded again rather than cached
+    frame_cache = None
+    if not args.no_frame_cache and video_dir is None:
+        max_bytes = (
+            int(args.frame_cache_max_gb * 1024**3)
+            if args.frame_cache_max_gb is not None
+            else config.FRAME_CACHE_MAX_BYTES
+        )
+        frame_cache = FrameCache(
+            args.frame_cache_dir or config.FRAME_CACHE_DIR,
+            max_bytes,
+            memory_max_bytes=config.FRAME_MEMORY_CACHE_MAX_BYTES if args.pipeline else 0,
+            store_raw=frame_pack is None,
+        )
+        BaseModel.frame_cache = frame_cache
+
+    # how frames are turned into the image payload of the API models
+    image_preprocessor = ImagePreprocessor(
+        image_format=args.image_format,
+        quality=args.image_quality,
+        max_side=args.image_max_side,
+        grayscale=args.image_grayscale,
+        passthrough=args.image_passthrough,
+    )
+    BaseModel.image_preprocessor = image_preprocessor
+
+    # pooled keep-alive session for frame downloads and the background look-ahead
+    configure_http(
+        timeout=args.http_timeout if args.http_timeout is not None else config.HTTP_TIMEOUT,
+        retries=args.http_retries if args.http_retries is not None else config.HTTP_RETRIES,
+        pool_size=args.http_pool_size if args.http_pool_size is not None else config.HTTP_POOL_SIZE,
+    )
+    prefetch_depth = (
+        args.prefetch_frames if args.prefetch_frames is not None else config.PREFETCH_FRAMES
+    )
+    prefetcher = None
+    if prefetch_depth > 0:
+        prefetcher = FramePrefetcher(prefetch_depth)
+        BaseModel.prefetcher = prefetcher
 
     # get prompt
     yaml_file = load_yaml_config("prompts.yaml")
     prompt = yaml_file["ocr"]
 
     # get the task processor
-    processor = task(prompt)
+    max_in_flight = dict(config.MAX_IN_FLIGHT)
+    if args.max_in_flight is not None:
+        max_in_flight = {provider: args.max_in_flight for provider in max_in_flight}
+
+    response_cache = None
+    if args.cache_mode != "off":
+        response_cache = ResponseCache(
+            args.response_cache_path or config.RESPONSE_CACHE_PATH, args.cache_mode
+        )
+
+    sampling = None
+    if args.adaptive_sampling:
+        sampling = {
+            "change_threshold": (
+                args.sampling_change_threshold
+                if args.sampling_change_threshold is not None
+                else config.SAMPLING_CHANGE_THRESHOLD
+            ),
+            "max_gap": (
+                args.sampling_max_gap
+                if args.sampling_max_gap is not None
+                else config.SAMPLING_MAX_GAP
+            ) or None,
+            "pixel_threshold": config.SAMPLING_PIXEL_THRESHOLD,
+            "thumbnail_width": config.SAMPLING_THUMBNAIL_WIDTH,
+        }
+
+    incremental = None
+    if args.incremental_ocr and args.workers > 1:
+        # each worker would diff against whichever frame it happened to read last
+        print(
+            "--incremental_ocr needs the frames of a video read in order by one engine, "
+            f"it is disabled with --workers {args.workers}"
+        )
+    elif args.incremental_ocr:
+        incremental = {
+            "tile_size": args.incremental_tile_size or config.INCREMENTAL_TILE_SIZE,
+            "pixel_threshold": (
+                args.incremental_pixel_threshold
+                if args.incremental_pixel_threshold is not None
+                else config.INCREMENTAL_PIXEL_THRESHOLD
+            ),
+            "max_changed_fraction": (
+                args.incremental_max_changed_fraction
+                if args.incremental_max_changed_fraction is not None
+                else config.INCREMENTAL_MAX_CHANGED_FRACTION
+            ),
+            "keyframe_interval": (
+                args.incremental_keyframe_interval
+                if args.incremental_keyframe_interval is not None
+                else config.INCREMENTAL_KEYFRAME_INTERVAL
+            ),
+        }
+
+    model_kwargs = {
+        "easyocr": {
+            "n_width": args.easyocr_n_width,
+            "n_height": args.easyocr_n_height,
+            "incremental": incremental,
+        },
+        "rapidocr": {
+            "incremental": incremental,
+            "intra_op_threads": args.ort_intra_op_threads,
+            "inter_op_threads": args.ort_inter_op_threads,
+            "graph_optimization": args.ort_graph_optimization,
+            "execution_mode": args.ort_execution_mode,
+            "cpu_mem_arena": (
+                None if args.ort_cpu_mem_arena is None else args.ort_cpu_mem_arena == "on"
+            ),
+        },
+    }
+
+    processor = task(
+        prompt,
+        async_requests=args.async_requests,
+        max_in_flight=max_in_flight,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        model_kwargs=model_kwargs,
+        dedup_threshold=args.dedup_threshold,
+        dedup_hash_size=args.dedup_hash_size,
+        response_cache=response_cache,
+        match_tolerance=config.SCENE_MATCH_TOLERANCE,
+        frames_per_call=args.frames_per_call,
+        packed_prompt=yaml_file["ocr_multi_frame"],
+        sampling=sampling,
+    )
+
+    # establish VideoDB connection and get the data, unless it is read from a local frame pack
+    conn = None
+    # nothing to catch when no VideoDB call is made
+    authentication_error = ()
+    if frame_pack is not None:
+        processor.frame_pack = frame_pack
+    else:
+        import videodb
 
-    # establish VideoDB connection and get the data
-    conn = processor.establish_videodb_connection()
+        authentication_error = videodb.exceptions.AuthenticationError
+        conn = processor.establish_videodb_connection()
 
-    # get videos
+    # get videos, every video of a local video directory
     try:
-        if config.VIDEO_IDS:
+        if config.VIDEO_IDS and video_dir is None:
             videos = processor.get_videos(
                 conn=conn,
                 video_ids=config.VIDEO_IDS.values(),
@@ -97,7 +692,7 @@ def main(args):
             videos = processor.get_videos(
                 conn=conn, collection_id=config.COLLECTION_ID, num_vids=args.num_vids
             )
-    except videodb.exceptions.AuthenticationError:
+    except authentication_error:
         print(
             "Please make sure VIDEO_DB_API_KEY is set in your .env like VIDEO_DB_API_KEY=sk-****-****"
         )
@@ -106,56 +701,129 @@ def main(args):
         print(f"Run failed due to {e}")
         return
 
-    # itereate through all the models
+    categories = video_categories(config.VIDEO_IDS)
+    if video_dir is not None:
+        categories.update(video_categories({video.name: video.id for video in videos}))
+        # local videos are only run when they have a ground truth file to be scored against
+        scored_videos = []
+        for video in videos:
+            if os.path.exists(os.path.join(ground_truth_dir, f"{video.id}_ground_truth.json")):
+                scored_videos.append(video)
+            else:
+                print(f"No {video.id}_ground_truth.json in {ground_truth_dir}, skipping {video.id}")
+        videos = scored_videos
+
+    # frame level evaluations and run_stats of every run, queried by save_summary
+    results_store = ResultsStore(config.RESULTS_STORE_PATH)
+
+    # set up every model: logging, warm-up and the counters carried over from a resumed run
+    model_runs = {}
     for path in args.save_paths:
         model_name = os.path.basename(path)
 
-        logger, current_run_dir = setup_logging(path, current_run)
+        logger, current_run_dir = setup_logging(path, current_run, resume=bool(args.resume))
+        previous_stats = load_run_stats(current_run_dir) if args.resume else {}
 
         logger.info(
             f"################################ Running {model_name} Model on OCR Prompt ################################\n"
         )
 
-        # iterate through all the videos
-        
-        for video in tqdm(videos, desc="Processing videos", unit="video"):
-          
-            video_scenes = processor.get_scenes(video)
-            outputs = processor.run(model_name, video_scenes, video.id)
-
-            if outputs is not None:
-                json_file = os.path.join(current_run_dir, f"{video.id}_output.json")
-                with open(json_file, "w") as file:
-                    json.dump(outputs, file)
-                logger.info(f"model results of {video.id} saved to {json_file}")
-
-            else:
-                logger.info(f"failed to save model results of {video.id}")
-
-            # Evaluation
-
-            # load ground truth
-            gt_file = os.path.join(
-                config.OCR_GROUND_TRUTH_DIR, f"{video.id}_ground_truth.json"
-            )
-            with open(gt_file, "r", encoding='utf-8') as file:
-                video_ground_truth = json.load(file)
-
-            video_result = processor.evaluate(outputs, video_ground_truth)
-
-            # save it in evaluation directory
-            os.makedirs(os.path.join(current_run_dir, "evaluations"), exist_ok=True)
-
-            eval_json_file = os.path.join(
-                current_run_dir, "evaluations", f"{video.id}.json"
+        # load the model once and warm it up, so engine construction is kept out of per-frame processing_time
+        warmup_time = processor.warmup(model_name)
+        update_run_stats(current_run_dir, warmup_time=warmup_time)
+        logger.info(f"{model_name} warm-up took {warmup_time:.3f}s")
+
+        model_runs[model_name] = {
+            "logger": logger,
+            "current_run_dir": current_run_dir,
+            "previous_stats": previous_stats,
+            "results_store": results_store,
+            "ground_truth_dir": ground_truth_dir,
+            "total_frames": previous_stats.get("total_frames", 0),
+            "inference_wall_time": previous_stats.get("inference_wall_time", 0.0),
+        }
+
+    if args.pipeline:
+        run_pipeline(processor, videos, model_runs, config, args.prefetch_videos)
+
+        if frame_cache is not None:
+            for model_run in model_runs.values():
+                model_run["logger"].info(f"shared frame cache stats: {frame_cache.stats()}")
+    else:
+        # iterate through all the models
+        for model_name, model_run in model_runs.items():
+            # iterate through all the videos
+            for video in tqdm(videos, desc="Processing videos", unit="video"):
+                process_video(processor, model_name, model_run, video, config)
+
+            if frame_cache is not None:
+                model_run["logger"].info(f"frame cache stats for {model_name}: {frame_cache.stats()}")
+                frame_cache.reset_stats()
+
+    for model_name, model_run in model_runs.items():
+        logger = model_run["logger"]
+        previous_stats = model_run["previous_stats"]
+        failed_scenes_by_video = {
+            **previous_stats.get("failed_scenes_by_video", {}),
+            **processor.failed_scenes[model_name],
+        }
+        total_frames = model_run["total_frames"]
+        inference_wall_time = model_run["inference_wall_time"]
+
+        frames_per_sec = total_frames / inference_wall_time if inference_wall_time else 0.0
+        run_stats = update_run_stats(
+            model_run["current_run_dir"],
+            total_frames=total_frames,
+            inference_wall_time=inference_wall_time,
+            frames_per_sec=frames_per_sec,
+            workers=args.workers if processor.use_worker_pool(processor.get_model(model_name)) else 1,
+            batch_size=args.batch_size,
+            frames_per_call=(
+                args.frames_per_call if processor.packs_frames(processor.get_model(model_name)) else 1
+            ),
+            dedup_threshold=args.dedup_threshold,
+            adaptive_sampling=sampling,
+            cache_mode=args.cache_mode,
+            pipeline=args.pipeline,
+            image_preprocessing=image_preprocessor.settings(),
+            prefetch_frames=prefetch_depth,
+            onnx_session=onnx_session_settings(processor, model_name, args),
+            incremental_ocr=(
+                incremental
+                if getattr(processor.get_model(model_name), "incremental", None) is not None
+                else None
+            ),
+            # a resumed video's failures replace those of its earlier runs instead of adding to them
+            failed_scenes=sum(failed_scenes_by_video.values()),
+            failed_scenes_by_video=failed_scenes_by_video,
+            **{
+                counter: previous_stats.get(counter, 0) + value
+                for counter, value in processor.counters[model_name].items()
+            },
+        )
+        results_store.set_run_stats(current_run, model_name, run_stats)
+        logger.info(
+            f"{model_name} processed {total_frames} frames in {inference_wall_time:.2f}s ({frames_per_sec:.2f} frames/sec)"
+        )
+        if response_cache is not None:
+            logger.info(
+                f"response cache ({args.cache_mode}) avoided {processor.counters[model_name]['response_cache_hits']} requests for {model_name}"
             )
-            with open(eval_json_file, "w") as file:
-                json.dump(video_result, file)
 
-            logger.info(f"results evaluations of {video.id} saved to {eval_json_file}")
+    processor.close()
+    if prefetcher is not None:
+        print(f"frame prefetch stats: {prefetcher.stats()}")
+        prefetcher.close()
 
     # Evaluation summary
-    save_summary(current_run)
+    save_summary(
+        results_store,
+        current_run,
+        reference_run=args.reference_run,
+        pricing=config.MODEL_PRICING,
+        categories=categories,
+    )
+    results_store.close()
 
 
 if __name__ == "__main__":
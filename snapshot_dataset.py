@@ -0,0 +1,76 @@
+"""
+Snapshot the benchmark dataset into a local frame pack.
+
+Every scene of every video is extracted through VideoDB once, and the frame bytes
+plus the scene start/end times are written into a single packed file with an
+offset index. Runs can then read it with `run.py --dataset local:<path>`, without
+network access.
+"""
+
+import argparse
+from functools import partial
+
+import videodb
+from tqdm import tqdm
+
+from models import FrameCache, FramePackWriter
+from models.base_model import download_image
+from tasks import get_task
+
+
+def get_args_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser("Snapshot the OCR benchmark dataset", add_help=False)
+    parser.add_argument("--output", default="ocr_dataset.pack", type=str)
+    parser.add_argument("--num_vids", default=100, type=int)
+    parser.add_argument(
+        "--no_frame_cache",
+        action="store_true",
+        help="Download every frame instead of reading already cached frames from the frame cache",
+    )
+    return parser
+
+
+def main(args):
+    task, config = get_task("ocr")
+    processor = task()
+
+    fetch = download_image
+    if not args.no_frame_cache:
+        frame_cache = FrameCache(config.FRAME_CACHE_DIR, config.FRAME_CACHE_MAX_BYTES)
+        fetch = partial(frame_cache.get_bytes, fetch=download_image)
+
+    try:
+        conn = processor.establish_videodb_connection()
+        videos = processor.get_videos(
+            conn=conn,
+            video_ids=config.VIDEO_IDS.values() if config.VIDEO_IDS else None,
+            collection_id=config.COLLECTION_ID,
+            num_vids=args.num_vids,
+        )
+    except videodb.exceptions.AuthenticationError:
+        print(
+            "Please make sure VIDEO_DB_API_KEY is set in your .env like VIDEO_DB_API_KEY=sk-****-****"
+        )
+        return
+
+    with FramePackWriter(args.output, collection_id=config.COLLECTION_ID) as writer:
+        for video in tqdm(videos, desc="Snapshotting videos", unit="video"):
+            for scene in processor.get_scenes(video):
+                writer.add_scene(
+                    video.id,
+                    video.name,
+                    scene.start,
+                    scene.end,
+                    [(frame.url, fetch(frame.url)) for frame in scene.frames],
+                )
+
+    print(f"Snapshot of {len(videos)} videos written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Snapshot the OCR benchmark dataset", parents=[get_args_parser()]
+    )
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,129 @@
+"""
+Sweep image preprocessing settings to find the smallest input that keeps accuracy.
+
+The selected models are run once per setting, each setting as its own run named
+<sweep_name>_<variant>. Payload bytes and latency are tabulated against CER in
+evaluation_summary/<sweep_name>_sweep.json and .csv. Per model, the setting with the
+smallest payload whose CER is within --max_cer_increase of the best one is marked
+as recommended.
+
+Settings are written as <format>[,quality=Q][,max_side=N][,grayscale][,passthrough], e.g.
+    python sweep_preprocessing.py --model gpt-4o --settings jpeg webp,quality=80,max_side=1024
+"""
+
+import argparse
+from datetime import datetime
+
+import run
+from models import ImagePreprocessor
+from utils import run_sweep, write_sweep_report
+
+
+DEFAULT_SETTINGS = [
+    "jpeg",
+    "jpeg,passthrough",
+    "jpeg,quality=85,max_side=1536",
+    "jpeg,quality=75,max_side=1024",
+    "webp,quality=80,max_side=1024",
+    "jpeg,quality=75,max_side=768,grayscale",
+]
+
+SWEEP_COLUMNS = (
+    "setting",
+    "run",
+    "model",
+    "avg_payload_bytes",
+    "avg_processing_time",
+    "p95_processing_time",
+    "avg_cer",
+    "avg_acc",
+    "recommended",
+)
+
+
+def parse_setting(setting: str) -> dict:
+    """
+    Returns:
+        dict: ImagePreprocessor arguments of a setting string.
+    """
+    image_format, *options = setting.split(",")
+    kwargs = {"image_format": image_format}
+    for option in options:
+        key, _, value = option.partition("=")
+        if key in ("grayscale", "passthrough"):
+            kwargs[key] = True
+        elif key in ("quality", "max_side"):
+            kwargs[key] = int(value)
+        else:
+            raise ValueError(f"Unknown preprocessing option: {option}")
+    return kwargs
+
+
+def get_args_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser("Sweep image preprocessing settings", add_help=False)
+    parser.add_argument("--settings", nargs="+", default=DEFAULT_SETTINGS)
+    parser.add_argument(
+        "--sweep_name",
+        default=f"sweep_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}",
+        type=str,
+    )
+    parser.add_argument(
+        "--max_cer_increase",
+        default=0.01,
+        type=float,
+        help="CER a setting may lose against the best setting of a model and still be recommended",
+    )
+    return parser
+
+
+def mark_recommended(rows: list, max_cer_increase: float) -> None:
+    for model in {row["model"] for row in rows}:
+        model_rows = [row for row in rows if row["model"] == model]
+        best_cer = min(row["avg_cer"] for row in model_rows)
+        candidates = [
+            row
+            for row in model_rows
+            if row["avg_cer"] <= best_cer + max_cer_increase
+            and row["avg_payload_bytes"] is not None
+        ]
+        if candidates:
+            min(candidates, key=lambda row: row["avg_payload_bytes"])["recommended"] = True
+
+
+def main(args):
+    variants = []
+    for setting in args.settings:
+        preprocessor = ImagePreprocessor(**parse_setting(setting))
+        overrides = {
+            "image_format": preprocessor.image_format,
+            "image_quality": preprocessor.quality,
+            "image_max_side": preprocessor.max_side,
+            "image_grayscale": preprocessor.grayscale,
+            "image_passthrough": preprocessor.passthrough,
+        }
+        run_name = f"{args.sweep_name}_{preprocessor.variant.removesuffix('.b64')}"
+        variants.append((run_name, overrides, {"setting": setting, "recommended": False}))
+
+    rows = run_sweep(run.main, args, variants, SWEEP_COLUMNS)
+    mark_recommended(rows, args.max_cer_increase)
+    rows.sort(key=lambda row: (row["model"], row["avg_payload_bytes"] or 0))
+    sweep_file = write_sweep_report(rows, f"{args.sweep_name}_sweep", SWEEP_COLUMNS)
+
+    for row in rows:
+        print(
+            f"{row['model']:<28} {row['setting']:<40} "
+            f"payload={row['avg_payload_bytes'] or 0:>10.0f}B "
+            f"latency={row['avg_processing_time']:.2f}s p95={row['p95_processing_time']:.2f}s "
+            f"cer={row['avg_cer']:.4f}{'  <- recommended' if row['recommended'] else ''}"
+        )
+    print(f"Sweep results written to {sweep_file}.json and {sweep_file}.csv")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Sweep image preprocessing settings",
+        parents=[run.get_args_parser(), get_args_parser()],
+    )
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,93 @@
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+
+class SceneAlignment:
+    """Result of joining the predictions of a video with its ground truth."""
+
+    def __init__(
+        self,
+        matched: List[Tuple[Dict, Dict]],
+        unmatched_predictions: List[Dict],
+        unmatched_ground_truth: List[Dict],
+    ):
+        self.matched = matched
+        self.unmatched_predictions = unmatched_predictions
+        self.unmatched_ground_truth = unmatched_ground_truth
+
+
+class SceneMatcher:
+    """
+    Matches predictions to the ground truth frames of a video one at a time, as
+    they are produced, with the same rule as align_scenes.
+    """
+
+    def __init__(self, video_ground_truth: List[Dict], tolerance: float):
+        """
+        Args:
+            video_ground_truth (List[Dict]): Ground truth records with start and end.
+            tolerance (float): Maximum difference between the timestamps, in seconds.
+        """
+        self.ground_truth = sorted(video_ground_truth, key=lambda scene: scene["start"])
+        self.tolerance = tolerance
+        self._starts = [scene["start"] for scene in self.ground_truth]
+        self._used = [False] * len(self.ground_truth)
+
+    def match(self, scene_pred: Dict) -> Dict | None:
+        """
+        Returns:
+            Dict | None: The closest unmatched ground truth frame whose start and end are both
+                within tolerance seconds of the prediction's, None if there is none.
+        """
+        start = scene_pred["scene_start_time"]
+        end = scene_pred["scene_end_time"]
+
+        best = None
+        i = bisect_left(self._starts, start - self.tolerance)
+        while i < len(self._starts) and self._starts[i] <= start + self.tolerance:
+            if not self._used[i] and abs(self.ground_truth[i]["end"] - end) <= self.tolerance:
+                if best is None or abs(self._starts[i] - start) < abs(self._starts[best] - start):
+                    best = i
+            i += 1
+
+        if best is None:
+            return None
+        self._used[best] = True
+        return self.ground_truth[best]
+
+    def unmatched_ground_truth(self) -> List[Dict]:
+        return [scene for scene, used in zip(self.ground_truth, self._used) if not used]
+
+
+def align_scenes(
+    video_predictions: List[Dict], video_ground_truth: List[Dict], tolerance: float
+) -> SceneAlignment:
+    """
+    Match every prediction to the ground truth frame of the same scene.
+
+    The ground truth is sorted by start time once and each prediction is looked
+    up with a binary search, so a missing or extra scene only leaves that scene
+    unmatched instead of shifting every scene after it. A prediction matches the
+    closest unmatched ground truth frame whose start and end are both within
+    tolerance seconds of its own.
+
+    Args:
+        video_predictions (List[Dict]): Output records with scene_start_time and scene_end_time.
+        video_ground_truth (List[Dict]): Ground truth records with start and end.
+        tolerance (float): Maximum difference between the timestamps, in seconds.
+
+    Returns:
+        SceneAlignment: The (prediction, ground truth) pairs in prediction order and the unmatched records of both sides.
+    """
+    matcher = SceneMatcher(video_ground_truth, tolerance)
+
+    matched = []
+    unmatched_predictions = []
+    for scene_pred in video_predictions:
+        scene_ground_truth = matcher.match(scene_pred)
+        if scene_ground_truth is None:
+            unmatched_predictions.append(scene_pred)
+        else:
+            matched.append((scene_pred, scene_ground_truth))
+
+    return SceneAlignment(matched, unmatched_predictions, matcher.unmatched_ground_truth())
@@ -1,32 +1,47 @@
-import os
-
-import models
-import videodb
+from models import MODEL_REGISTRY
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, TYPE_CHECKING
 
 from dotenv import load_dotenv
 
-load_dotenv()
+if TYPE_CHECKING:
+    import videodb
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-MOONDREAM_API_KEY = os.getenv("MOONDREAM_API_KEY")
+# API keys and base URLs (e.g. of the local mock_provider.py server) are read by the
+# model registry from the environment when a model is created
+load_dotenv()
 
 
 class BaseTask(ABC):
-    def __init__(self, prompt: str = None):
+    def __init__(self, prompt: str = None, model_kwargs: Dict[str, dict] = None):
         self.prompt = prompt
+        # extra constructor arguments of the local engines, keyed by model name
+        self.model_kwargs = model_kwargs or {}
+        # local FramePack videos and scenes are read from instead of VideoDB
+        self.frame_pack = None
+        # model instances are reused across videos so engines are only loaded once
+        self._models = {}
 
     @abstractmethod
-    def run(self, model_name: str, video_scenes: List[Any], video_id: str) -> Dict:
-        """Run the task on given video scenes"""
+    def run(
+        self,
+        model_name: str,
+        video_scenes: List[Any],
+        video_id: str,
+        checkpoint_path: str = None,
+        on_output: Callable[[Dict], None] = None,
+    ) -> tuple[int, int]:
+        """
+        Run the task on given video scenes, streaming every output to checkpoint_path and on_output.
+
+        Returns:
+            tuple[int, int]: Number of scenes with an output, and number of those produced by this call.
+        """
         pass
 
     @abstractmethod
-    def get_scenes(self, video: videodb.video = None) -> List[Any]:
+    def get_scenes(self, video: "videodb.video" = None) -> List[Any]:
         """get the video scenes"""
         pass
 
@@ -35,17 +50,22 @@ class BaseTask(ABC):
         """Number of frames to process per API call"""
         pass
 
-    def establish_videodb_connection(self) -> tuple[videodb.Connection, str]:
+    def establish_videodb_connection(self) -> tuple["videodb.Connection", str]:
+        import videodb
+
         conn = videodb.connect()
         return conn
 
     def get_videos(
         self,
-        conn: videodb.Connection,
+        conn: "videodb.Connection",
         collection_id: str = None,
         video_ids: List[str] = None,
         num_vids: int = None,
     ) -> List[Any]:
+        if self.frame_pack is not None:
+            return self.frame_pack.get_videos(video_ids)[:num_vids]
+
         if not video_ids:
             coll = conn.get_collection(collection_id)
             videos = coll.get_videos()
@@ -62,26 +82,14 @@ class BaseTask(ABC):
         return videos[:num_vids]
 
     def get_model(self, model_name: str) -> Any:
-        if "gemini" in model_name:
-            return models.Gemini(model_name, GEMINI_API_KEY)
-
-        elif "gpt" in model_name:
-            return models.Openai(model_name, OPENAI_API_KEY)
-
-        elif "claude" in model_name:
-            return models.Claude(model_name, ANTHROPIC_API_KEY)
-
-        elif "moondream" in model_name:
-            return models.Moondream(model_name, MOONDREAM_API_KEY)
-
-        elif model_name == "rapidocr":
-            return models.Rapidocr(model_name)
-
-        elif model_name == "easyocr":
-            return models.Easyocr(model_name)
-
-        else:
-            raise AttributeError(f"Model '{model_name}' is not implemented.")
+        if model_name not in self._models:
+            self._models[model_name] = self._create_model(
+                model_name, **self.model_kwargs.get(model_name, {})
+            )
+        return self._models[model_name]
+
+    def _create_model(self, model_name: str, **model_kwargs) -> Any:
+        return MODEL_REGISTRY.create(model_name, **model_kwargs)
 
     def evaluate(
         self, video_predictions: Dict = None, video_ground_truth: Dict = None
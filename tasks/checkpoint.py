@@ -0,0 +1,60 @@
+import json
+import os
+import threading
+from typing import Dict
+
+
+class SceneCheckpoint:
+    """
+    Append-only JSONL file with one output record per completed scene.
+
+    Records are flushed as soon as a scene completes, so the file holds the
+    outputs of a video while it is still running and a crashed run can be
+    resumed without describing the completed scenes again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._tail_checked = False
+
+    def load(self) -> Dict[float, Dict]:
+        """
+        Returns:
+            Dict[float, Dict]: Completed output records keyed by scene_start_time.
+        """
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # the last line may be cut short if the run died while writing it
+                    continue
+                records[record["scene_start_time"]] = record
+        return records
+
+    def append(self, record: Dict) -> None:
+        with self._lock:
+            if not self._tail_checked:
+                self._drop_partial_line()
+                self._tail_checked = True
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+
+    def _drop_partial_line(self) -> None:
+        """Cut a last line left unfinished by a crash, so the next record starts on its own line."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            f.truncate(f.read().rfind(b"\n") + 1)
@@ -0,0 +1,80 @@
+from typing import Callable, List
+
+from PIL import Image
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Difference hash of an image: the sign of the horizontal gradient of a
+    (hash_size + 1) x hash_size grayscale thumbnail, packed into an int.
+    """
+    thumbnail = image.convert("L").resize(
+        (hash_size + 1, hash_size), Image.Resampling.LANCZOS
+    )
+    pixels = list(thumbnail.getdata())
+
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class FrameDeduplicator:
+    """
+    Finds scenes whose frames are near-identical to the last scene that was sent
+    to the model, so the model output of that scene can be reused.
+
+    Frames are compared with the last described scene rather than the previous
+    one, so slow changes cannot accumulate across a run of reused frames.
+    """
+
+    def __init__(
+        self,
+        threshold: int,
+        load_image: Callable[[str], Image.Image],
+        hash_size: int = 8,
+    ):
+        """
+        Args:
+            threshold (int): Maximum Hamming distance between the frame hashes for a scene to be reused.
+            load_image (Callable): Loads a frame URL into a PIL image.
+            hash_size (int): Side of the difference hash, the hash has hash_size**2 bits.
+        """
+        self.threshold = threshold
+        self.load_image = load_image
+        self.hash_size = hash_size
+
+    def frame_hashes(self, frame_urls: List[str]) -> List[int]:
+        return [dhash(self.load_image(url), self.hash_size) for url in frame_urls]
+
+    def plan(self, scene_frame_urls: List[List[str]]) -> List[int]:
+        """
+        Returns:
+            List[int]: For every scene, the index of the scene whose output it uses (itself if it must be described).
+        """
+        sources = []
+        source_hashes = None
+
+        for i, frame_urls in enumerate(scene_frame_urls):
+            hashes = self.frame_hashes(frame_urls)
+            if (
+                source_hashes is not None
+                and len(hashes) == len(source_hashes)
+                and all(
+                    hamming_distance(a, b) <= self.threshold
+                    for a, b in zip(hashes, source_hashes)
+                )
+            ):
+                sources.append(sources[-1])
+            else:
+                sources.append(i)
+                source_hashes = hashes
+
+        return sources
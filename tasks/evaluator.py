@@ -0,0 +1,89 @@
+import json
+import os
+import time
+from typing import Callable, Dict, List
+
+from .alignment import SceneMatcher
+from models.tracing import span
+
+
+class StreamingEvaluator:
+    """
+    Scores the output records of a video as they are produced.
+
+    Every record is matched against the pre-loaded ground truth and scored right
+    away, and its result is appended to <path>.partial. Results are handed to
+    on_results in groups of flush_every, so partial results can be read while the
+    video is still running. close(complete=True) renames the file to path, which
+    marks the evaluation of the video as done.
+    """
+
+    def __init__(
+        self,
+        score: Callable[[List[tuple]], List[Dict]],
+        video_ground_truth: List[Dict],
+        tolerance: float,
+        path: str,
+        on_results: Callable[[List[Dict]], None] = None,
+        flush_every: int = 32,
+    ):
+        """
+        Args:
+            score (Callable): Scores (prediction, ground truth) pairs, e.g. OCR.score_matched.
+            video_ground_truth (List[Dict]): Ground truth records of the video.
+            tolerance (float): Maximum timestamp difference, in seconds, between a prediction and its ground truth frame.
+            path (str): JSONL file of the evaluation results.
+            on_results (Callable): Called with every group of new results, e.g. to add them to the results store.
+            flush_every (int): Number of results handed to on_results at once.
+        """
+        self.score = score
+        self.matcher = SceneMatcher(video_ground_truth, tolerance)
+        self.path = path
+        self.on_results = on_results
+        self.flush_every = flush_every
+
+        self.scored = 0
+        self.unmatched_predictions = 0
+        # time spent evaluating, so callers can keep it out of inference time
+        self.elapsed = 0.0
+        self._pending = []
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # a resumed video is scored again from its first record
+        self._file = open(f"{path}.partial", "w", encoding="utf-8")
+
+    def add(self, record: Dict) -> None:
+        start_time = time.time()
+        with span("evaluate"):
+            scene_ground_truth = self.matcher.match(record)
+            if scene_ground_truth is None:
+                self.unmatched_predictions += 1
+            else:
+                result = self.score([(record, scene_ground_truth)])[0]
+                self._file.write(json.dumps(result) + "\n")
+                self._file.flush()
+                self.scored += 1
+                self._pending.append(result)
+                if len(self._pending) >= self.flush_every:
+                    self.flush()
+        self.elapsed += time.time() - start_time
+
+    def flush(self) -> None:
+        if self._pending and self.on_results is not None:
+            self.on_results(self._pending)
+        self._pending = []
+
+    @property
+    def unmatched_ground_truth(self) -> int:
+        return len(self.matcher.unmatched_ground_truth())
+
+    def close(self, complete: bool) -> None:
+        """
+        Args:
+            complete (bool): Every scene of the video has an output, so its evaluation is final.
+        """
+        self.flush()
+        self._file.close()
+        if complete:
+            os.replace(f"{self.path}.partial", self.path)
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from collections import deque
+
+
+class ProviderLimiter:
+    """
+    Caps the requests in flight to one provider across threads and event loops.
+
+    Models of the same provider running side by side (--pipeline) each run their own
+    event loop in their own thread, so an asyncio.Semaphore per run would give every
+    model the full limit. Waiting requests are queued first in, first out and a freed
+    slot is handed to the next one on its own loop, without blocking a thread.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters = deque()
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # the slot was already handed over, pass it on
+            self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._in_flight -= 1
+                return
+            # the slot goes straight to the next waiter, in_flight stays the same
+            loop, future = self._waiters.popleft()
+        loop.call_soon_threadsafe(_wake, future)
+
+    async def __aenter__(self) -> "ProviderLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,139 @@
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+from rapidfuzz.distance import Levenshtein
+from rapidfuzz.process import cpdist
+
+
+def preprocess_text(text: str) -> str:
+    # Remove any surrounding quotes
+    text = text.strip('"')
+    # Remove newlines and extra whitespace
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+
+def _words_to_strings(texts: List[str], vocabulary: Dict[str, str]) -> List[str]:
+    """
+    Map every word to a single character, so word level edit distances can be
+    computed by the string distance kernels.
+    """
+    encoded = []
+    for text in texts:
+        chars = []
+        for word in text.split():
+            char = vocabulary.get(word)
+            if char is None:
+                code = len(vocabulary)
+                # skip the surrogate range, those are not valid characters
+                if code >= 0xD800:
+                    code += 0x800
+                char = vocabulary[word] = chr(code)
+            chars.append(char)
+        encoded.append("".join(chars))
+    return encoded
+
+
+def order_agnostic_accuracy(ground_truth: str, ocr_text: str) -> float:
+    """
+    Share of the ground truth characters found in the OCR text, regardless of their order.
+
+    Returns:
+        float: Accuracy between 0 and 100
+    """
+    if not ground_truth:
+        return 0.0
+
+    matching = sum((Counter(ground_truth) & Counter(ocr_text)).values())
+    return matching / len(ground_truth) * 100
+
+
+class OCRMetrics:
+    """
+    Batch OCR metrics.
+
+    All pairs are normalized up front and the character and word edit distances
+    of the distinct pairs are computed in one call each. Scores are memoized per
+    (ground truth, prediction) pair, frames repeat a lot within and across runs.
+
+    CER = (S + D + I) / N over characters, 1.0 for an empty ground truth
+    WER = (S + D + I) / N over words, 1.0 for an empty ground truth
+    Accuracy = (1 - CER) * 100
+    """
+
+    def __init__(self, workers: int = -1):
+        """
+        Args:
+            workers (int): Threads used by the distance kernels, -1 uses all cores.
+        """
+        self.workers = workers
+        self._scores: Dict[Tuple[str, str], Tuple[float, float, float, float]] = {}
+
+    def _score_pairs(self, pairs: List[Tuple[str, str]]) -> None:
+        ground_truths = [ground_truth for ground_truth, _ in pairs]
+        predictions = [prediction for _, prediction in pairs]
+
+        char_distances = cpdist(
+            ground_truths, predictions, scorer=Levenshtein.distance, workers=self.workers
+        )
+
+        vocabulary = {}
+        ground_truth_words = _words_to_strings(ground_truths, vocabulary)
+        prediction_words = _words_to_strings(predictions, vocabulary)
+        word_distances = cpdist(
+            ground_truth_words,
+            prediction_words,
+            scorer=Levenshtein.distance,
+            workers=self.workers,
+        )
+
+        for i, (ground_truth, prediction) in enumerate(pairs):
+            n_chars = len(ground_truth)
+            n_words = len(ground_truth_words[i])
+            cer = char_distances[i] / n_chars if n_chars else 1.0
+            wer = word_distances[i] / n_words if n_words else 1.0
+            self._scores[(ground_truth, prediction)] = (
+                float(cer),
+                float(wer),
+                float((1 - cer) * 100),
+                order_agnostic_accuracy(ground_truth, prediction),
+            )
+
+    def score(
+        self, ground_truths: List[str], predictions: List[str], normalize: bool = True
+    ) -> Dict[str, np.ndarray]:
+        """
+        Args:
+            ground_truths (List[str]): Ground truth text of every frame.
+            predictions (List[str]): OCR output of every frame, in the same order.
+            normalize (bool): Run preprocess_text on both sides first.
+
+        Returns:
+            Dict[str, np.ndarray]: cer, wer, accuracy and order_agnostic_accuracy arrays,
+            plus the normalized ground_truth and ocr texts.
+        """
+        if len(ground_truths) != len(predictions):
+            raise ValueError("ground_truths and predictions must have the same length")
+
+        if normalize:
+            ground_truths = [preprocess_text(text) for text in ground_truths]
+            predictions = [preprocess_text(text) for text in predictions]
+
+        pairs = list(zip(ground_truths, predictions))
+        new_pairs = list(dict.fromkeys(pair for pair in pairs if pair not in self._scores))
+        if new_pairs:
+            self._score_pairs(new_pairs)
+
+        scores = np.array(
+            [self._scores[pair] for pair in pairs], dtype=np.float64
+        ).reshape(len(pairs), 4)
+        return {
+            "ground_truth": np.array(ground_truths, dtype=object),
+            "ocr": np.array(predictions, dtype=object),
+            "cer": scores[:, 0],
+            "wer": scores[:, 1],
+            "accuracy": scores[:, 2],
+            "order_agnostic_accuracy": scores[:, 3],
+        }
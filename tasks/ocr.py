@@ -1,19 +1,150 @@
+from .alignment import align_scenes
 from .base_task import BaseTask
-
-from typing import List, Dict, Any
-import re
-from collections import Counter
-import Levenshtein
+from .checkpoint import SceneCheckpoint
+from .dedup import FrameDeduplicator
+from .limiter import ProviderLimiter
+from .metrics import OCRMetrics
+from .packing import split_usage, unpack_outputs
+from .sampling import AdaptiveSampler
+from models import LocalEnginePool, ResponseCache
+from models.tracing import span, trace_context
+
+from typing import List, Dict, Any, Callable, TYPE_CHECKING
+import asyncio
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
-import videodb
+
+if TYPE_CHECKING:
+    import videodb
 
 
 class OCR(BaseTask):
-    def __init__(self, prompt: str = None):
-        super().__init__(prompt)
+    def __init__(
+        self,
+        prompt: str = None,
+        async_requests: bool = False,
+        max_in_flight: Dict[str, int] = None,
+        workers: int = 1,
+        batch_size: int = 1,
+        model_kwargs: Dict[str, dict] = None,
+        dedup_threshold: int = None,
+        dedup_hash_size: int = 8,
+        response_cache: ResponseCache = None,
+        match_tolerance: float = 0.05,
+        frames_per_call: int = 1,
+        packed_prompt: str = None,
+        sampling: dict = None,
+    ):
+        """
+        Args:
+            prompt (str): OCR prompt sent to the models.
+            async_requests (bool): Send requests of API models concurrently instead of one scene at a time.
+            max_in_flight (Dict[str, int]): Maximum number of concurrent requests per provider.
+            workers (int): Number of processes running the local OCR engines.
+            batch_size (int): Number of scenes handed to model.describe_batch at once.
+            model_kwargs (Dict[str, dict]): Extra constructor arguments of the local engines, keyed by model name.
+            dedup_threshold (int): Reuse the previous output for frames within this perceptual hash distance, None disables it.
+            dedup_hash_size (int): Side of the perceptual hash used for deduplication.
+            response_cache (ResponseCache): Cache model responses are served from and/or stored in.
+            match_tolerance (float): Maximum timestamp difference, in seconds, between a prediction and its ground truth frame.
+            frames_per_call (int): Number of scenes packed into one request of the API models.
+            packed_prompt (str): Prompt of packed requests, asking for a JSON answer keyed by image index.
+            sampling (dict): AdaptiveSampler settings to only read scenes that changed, None reads every scene.
+        """
+        super().__init__(prompt, model_kwargs)
+        self.async_requests = async_requests
+        self.max_in_flight = max_in_flight or {}
+        self.workers = workers
+        self.batch_size = batch_size
+        self.dedup_threshold = dedup_threshold
+        self.dedup_hash_size = dedup_hash_size
+        self.response_cache = response_cache
+        self.match_tolerance = match_tolerance
+        self.frames_per_call = frames_per_call
+        self.packed_prompt = packed_prompt
+        self.sampling = sampling
+        # run level counters (calls saved, ...) per model, merged into run_stats.json by run.py
+        self.counters = defaultdict(Counter)
+        # scenes without an output per video per model, replaced whenever a video is run again
+        self.failed_scenes = defaultdict(dict)
+        self.metrics = OCRMetrics()
+        self._pools = {}
+        # one limiter per provider, shared by every model of the provider and every thread
+        self._limiters = {}
+        self._limiters_lock = threading.Lock()
         self.num_frames_per_call()
 
-    def get_scenes(self, video: videodb.video = None) -> List[Any]:
+    def use_worker_pool(self, model: Any) -> bool:
+        return self.workers > 1 and model.provider is None
+
+    def get_pool(self, model_name: str) -> LocalEnginePool:
+        if model_name not in self._pools:
+            model = self.get_model(model_name)
+            self._pools[model_name] = LocalEnginePool(
+                type(model),
+                model_name,
+                self.workers,
+                self.model_kwargs.get(model_name),
+            )
+        return self._pools[model_name]
+
+    def get_limiter(self, provider: str) -> ProviderLimiter:
+        with self._limiters_lock:
+            if provider not in self._limiters:
+                self._limiters[provider] = ProviderLimiter(self.max_in_flight[provider])
+            return self._limiters[provider]
+
+    def warmup(self, model_name: str) -> float:
+        """Load the model (or start its worker processes) and return the warm-up time."""
+        model = self.get_model(model_name)
+        if self.use_worker_pool(model):
+            return self.get_pool(model_name).warmup_time
+        return model.warmup()
+
+    def prefetch_frames(
+        self, video_scenes: List[Any], model_names: List[str], max_workers: int = 8
+    ) -> None:
+        """
+        Fetch every frame of the scenes once, and decode (local engines) and/or encode
+        (API models) it once, so every model then reads it from the shared frame cache.
+        """
+        selected_models = [self.get_model(model_name) for model_name in model_names]
+        # without a frame cache there is nowhere to keep them, e.g. frames of local videos are decoded on demand
+        if selected_models[0].frame_cache is None:
+            return
+        loaders = []
+        api_models = [model for model in selected_models if model.provider is not None]
+        local_models = [model for model in selected_models if model.provider is None]
+        if api_models:
+            loaders.append(api_models[0].encode_image)
+        if local_models:
+            loaders.append(local_models[0].load_image)
+
+        def prefetch(url):
+            try:
+                for load in loaders:
+                    load(url)
+            except Exception as e:
+                # the models fetch it again themselves and report the failure per scene
+                print(f"Prefetching {url} failed: {e}")
+
+        frame_urls = [frame.url for scene in video_scenes for frame in scene.frames]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(prefetch, frame_urls))
+
+    def close(self) -> None:
+        for pool in self._pools.values():
+            pool.close()
+        self._pools = {}
+
+    def get_scenes(self, video: "videodb.video" = None) -> List[Any]:
+        if self.frame_pack is not None:
+            return video.scenes
+
+        import videodb
+
         try:
             extracted_scenes = video.extract_scenes(
                 extraction_type=videodb.SceneExtractionType.time_based,
@@ -42,155 +173,460 @@ class OCR(BaseTask):
 
         return video_scenes
 
-    def run(self, model_name: str, video_scenes: List[Any], video_id: str) -> Dict:
-        outputs = []
+    def run(
+        self,
+        model_name: str,
+        video_scenes: List[Any],
+        video_id: str,
+        checkpoint_path: str = None,
+        on_output: Callable[[Dict], None] = None,
+    ) -> tuple[int, int]:
+        """
+        Run the model on the scenes of a video, streaming every output record as it is produced.
+
+        Args:
+            model_name (str): Model to run.
+            video_scenes (List[Any]): Scenes of the video.
+            video_id (str): Id of the video.
+            checkpoint_path (str): JSONL file every output record is appended to. Scenes already
+                in it are not described again, so an interrupted run can be resumed.
+            on_output (Callable[[Dict], None]): Called with every output record in completion
+                order, including the records a resumed run loads from checkpoint_path.
+
+        Returns:
+            tuple[int, int]: Number of scenes with an output, and number of those whose output
+                was produced by this call, neither loaded from checkpoint_path nor served from
+                the response cache. Scenes that
+                failed have none, so fewer outputs than scenes means the video has to be retried.
+        """
+        # spans of the models and engines below are attributed to this model and video
+        with trace_context(model_name, video_id):
+            return self._run(model_name, video_scenes, video_id, checkpoint_path, on_output)
+
+    def _run(
+        self,
+        model_name: str,
+        video_scenes: List[Any],
+        video_id: str,
+        checkpoint_path: str = None,
+        on_output: Callable[[Dict], None] = None,
+    ) -> tuple[int, int]:
+        scene_frame_urls = [
+            [frame.url for frame in scene.frames] for scene in video_scenes
+        ]
+
+        # incremental engines diff against the previous frame, which must not be one of another video
+        incremental = getattr(self.get_model(model_name), "incremental", None)
+        if incremental is not None:
+            incremental.reset()
+
+        checkpoint = SceneCheckpoint(checkpoint_path) if checkpoint_path else None
+        completed = checkpoint.load() if checkpoint else {}
+
+        # scenes the adaptive sampler skips hold the output of the last sampled scene
+        sources = list(range(len(video_scenes)))
+        if self.sampling is not None:
+            sampler = AdaptiveSampler(self.get_model(model_name).load_image, **self.sampling)
+            with span("sampling"):
+                sources = sampler.plan(scene_frame_urls, [scene.start for scene in video_scenes])
+        sampled = sorted(set(sources))
+
+        # sampled scenes whose frames are near-identical to the last described scene reuse its output
+        if self.dedup_threshold is not None:
+            deduplicator = FrameDeduplicator(
+                self.dedup_threshold,
+                self.get_model(model_name).load_image,
+                self.dedup_hash_size,
+            )
+            with span("dedup"):
+                dedup_sources = deduplicator.plan([scene_frame_urls[i] for i in sampled])
+            dedup_source = {i: sampled[j] for i, j in zip(sampled, dedup_sources)}
+            sources = [dedup_source[source] for source in sources]
+        described = sorted(set(sources))
+        pending = [i for i in described if video_scenes[i].start not in completed]
+
+        reused_by = defaultdict(list)
+        for i, source in enumerate(sources):
+            if source != i:
+                reused_by[source].append(i)
+
+        # records are streamed out and not kept, only the scenes that have one are tracked
+        emitted = set()
+        num_produced = 0
+        # calls saved are counted for the outputs this call produces, not those a resumed run loads
+        sampled_scenes = set(sampled)
+        saved = Counter()
+
+        def emit(record, append=True):
+            nonlocal num_produced
+            emitted.add(record["scene_start_time"])
+            if append:
+                # responses served from the response cache took no inference, they do not count toward throughput
+                if not record.get("cached"):
+                    num_produced += 1
+                if checkpoint is not None:
+                    checkpoint.append(record)
+            if on_output is not None:
+                on_output(record)
+
+        def emit_reused(source, record):
+            for i in reused_by[source]:
+                if video_scenes[i].start not in emitted:
+                    saved["dedup" if i in sampled_scenes else "sampling"] += 1
+                    emit(
+                        {
+                            **record,
+                            "scene_start_time": video_scenes[i].start,
+                            "scene_end_time": video_scenes[i].end,
+                            "image": scene_frame_urls[i],
+                            "processing_time": 0.0,
+                            "usage": None,
+                            "reused": True,
+                            "reused_from": video_scenes[source].start,
+                        }
+                    )
+
+        for record in completed.values():
+            emit(record, append=False)
+        for i in described:
+            record = completed.get(video_scenes[i].start)
+            if record is not None:
+                emit_reused(i, record)
+        completed = None
+
+        def on_record(j, result):
+            i = pending[j]
+            record = {
+                "video_id": video_id,
+                "scene_start_time": video_scenes[i].start,
+                "scene_end_time": video_scenes[i].end,
+                "image": scene_frame_urls[i],
+                **result,
+            }
+            emit(record)
+            emit_reused(i, record)
+
+        with tqdm(total=len(pending), desc=f"Processing scenes for video {video_id}", unit="scene") as pbar:
+            self.describe_cached(
+                model_name, [scene_frame_urls[i] for i in pending], pbar, on_record
+            )
+
+        if self.sampling is not None:
+            self.counters[model_name]["sampling_calls_saved"] += saved["sampling"]
+        if self.dedup_threshold is not None:
+            self.counters[model_name]["dedup_calls_saved"] += saved["dedup"]
+
+        self.failed_scenes[model_name][video_id] = len(video_scenes) - len(emitted)
+        return len(emitted), num_produced
+
+    def describe_cached(
+        self,
+        model_name: str,
+        scene_frame_urls: List[List[str]],
+        pbar: tqdm = None,
+        on_record: Callable[[int, Dict], None] = None,
+    ) -> int:
+        """
+        describe_scenes behind the response cache: scenes with a cached response for
+        (model, prompt, frame hashes) are served from it, the rest are described and stored.
+
+        Returns:
+            int: Number of scenes with a record, served from the cache or described.
+        """
+        cache = self.response_cache
+        if cache is None or cache.mode == "off":
+            return self.describe_scenes(model_name, scene_frame_urls, pbar, on_record)
 
         model = self.get_model(model_name)
+        frame_hashes = [
+            [model.image_content_hash(url) for url in frame_urls]
+            for frame_urls in scene_frame_urls
+        ]
+        # responses to differently preprocessed or packed images of the API models are kept apart
+        variant_parts = []
+        if model.provider is not None and not model.image_preprocessor.is_default:
+            variant_parts.append(model.image_preprocessor.variant)
+        if self.packs_frames(model):
+            variant_parts.append(f"packed{self.frames_per_call}")
+        if getattr(model, "incremental", None) is not None:
+            variant_parts.append("incremental")
+        variant = "+".join(variant_parts) or None
+
+        missing = []
+        for i, hashes in enumerate(frame_hashes):
+            with span("response_cache"):
+                cached = cache.get(model_name, self.prompt, hashes, variant)
+            if cached is None:
+                missing.append(i)
+                continue
+            if on_record is not None:
+                on_record(i, {**cached, "cached": True})
+            if pbar is not None:
+                pbar.update(1)
 
-        with tqdm(total=len(video_scenes), desc=f"Processing scenes for video {video_id}", unit="scene") as pbar:
-            for scene in video_scenes:
-                frame_urls = []
-                # Iterate through each frame in the scene
-                for frame in scene.frames:
-                    frame_urls.append(frame.url)
-
-                processing_time, out = model.describe(frame_urls, self.prompt)
-
-                outputs.append(
-                    {
-                        "video_id": video_id,
-                        "scene_start_time": scene.start,
-                        "scene_end_time": scene.end,
-                        "processing_time": processing_time,
-                        "image": frame_urls,
-                        "model_output": out,
-                    }
-                )
+        hits = len(scene_frame_urls) - len(missing)
+        self.counters[model_name]["response_cache_hits"] += hits
+        self.counters[model_name]["response_cache_misses"] += len(missing)
+
+        def on_missing_record(j, record):
+            i = missing[j]
+            cache.put(
+                model_name,
+                self.prompt,
+                frame_hashes[i],
+                record["model_output"],
+                record["processing_time"],
+                record.get("usage"),
+                variant,
+            )
+            if on_record is not None:
+                on_record(i, record)
+
+        return hits + self.describe_scenes(
+            model_name, [scene_frame_urls[i] for i in missing], pbar, on_missing_record
+        )
+
+    def describe_scenes(
+        self,
+        model_name: str,
+        scene_frame_urls: List[List[str]],
+        pbar: tqdm = None,
+        on_record: Callable[[int, Dict], None] = None,
+    ) -> int:
+        """
+        Run the model on every scene with the configured execution mode.
+
+        on_record(i, record) is called as soon as scene i completes, with at least the
+        processing_time and model_output of the scene; records are not kept. A scene that
+        raises or returns no result is reported and gets no record, so the other scenes
+        still complete.
+
+        Returns:
+            int: Number of scenes with a record.
+        """
+        model = self.get_model(model_name)
+        num_records = 0
+
+        def complete(i, result, **extra):
+            nonlocal num_records
+            if result is not None:
+                num_records += 1
+                if on_record is not None:
+                    on_record(i, self.to_record(result, **extra))
+            if pbar is not None:
                 pbar.update(1)
 
-        return outputs
+        if self.packs_frames(model):
+            self.describe_packed(model_name, scene_frame_urls, complete)
+        else:
+            self.describe_calls(model_name, scene_frame_urls, self.prompt, complete)
+
+        return num_records
+
+    def describe_calls(
+        self,
+        model_name: str,
+        call_frame_urls: List[List[str]],
+        prompt: str,
+        complete: Callable[..., None],
+    ) -> None:
+        """
+        Make one model call per list of frame urls with the configured execution mode,
+        calling complete(i, result, **extra) as call i finishes. A call that raises
+        is reported and completed with None.
+        """
+        model = self.get_model(model_name)
+
+        if self.async_requests and model.provider in self.max_in_flight:
+            asyncio.run(self.describe_concurrently(model, call_frame_urls, prompt, complete))
+
+        elif self.use_worker_pool(model):
+            results = self.get_pool(model_name).imap(call_frame_urls, prompt)
+            for i, (result, error) in enumerate(results):
+                if error is not None:
+                    print(f"Scene description failed for {call_frame_urls[i]}: {error}")
+                complete(i, result)
+
+        elif self.batch_size > 1:
+            for start in range(0, len(call_frame_urls), self.batch_size):
+                batch = call_frame_urls[start : start + self.batch_size]
+                self.prefetch_ahead(model, call_frame_urls, start + self.batch_size)
+                try:
+                    results = model.describe_batch(batch, prompt)
+                except Exception as e:
+                    print(f"Batch description failed for {batch}: {e}")
+                    results = [None] * len(batch)
+                for i, result in enumerate(results, start):
+                    complete(i, result, batch_size=len(batch))
+
+        else:
+            for i, frame_urls in enumerate(call_frame_urls):
+                self.prefetch_ahead(model, call_frame_urls, i + 1)
+                try:
+                    with span("scene"):
+                        result = model.describe(frame_urls, prompt)
+                except Exception as e:
+                    print(f"Scene description failed for {frame_urls}: {e}")
+                    result = None
+                complete(i, result)
+
+    @staticmethod
+    def prefetch_ahead(model: Any, call_frame_urls: List[List[str]], start: int) -> None:
+        """
+        Schedule the frames of the calls from start on that are neither packed nor cached
+        for background download, up to the prefetcher's depth.
+        """
+        prefetcher = model.prefetcher
+        if prefetcher is None:
+            return
+        image_urls = []
+        for frame_urls in call_frame_urls[start:]:
+            image_urls.extend(url for url in frame_urls if model.needs_download(url))
+            if len(image_urls) >= prefetcher.depth:
+                break
+        prefetcher.schedule(image_urls[: prefetcher.depth])
+
+    def packs_frames(self, model: Any) -> bool:
+        return self.frames_per_call > 1 and model.provider is not None
+
+    def describe_packed(
+        self,
+        model_name: str,
+        scene_frame_urls: List[List[str]],
+        complete: Callable[..., None],
+    ) -> None:
+        """
+        Pack frames_per_call scenes into every request with the multi-frame prompt and
+        split the JSON answer back into one result per scene. The latency and usage of
+        a request are shared evenly between its scenes. Scenes of a request whose answer
+        cannot be parsed fail, so a resumed run retries them. Models return their raw
+        answer to packed requests and post-process every unpacked text instead.
+        """
+        model = self.get_model(model_name)
+        model.raw_output = True
+        groups = [
+            list(range(start, min(start + self.frames_per_call, len(scene_frame_urls))))
+            for start in range(0, len(scene_frame_urls), self.frames_per_call)
+        ]
+        call_frame_urls = [
+            [url for i in group for url in scene_frame_urls[i]] for group in groups
+        ]
+
+        def complete_call(j, result, **extra):
+            group = groups[j]
+            if result is None:
+                for i in group:
+                    complete(i, None)
+                return
+
+            processing_time, out, *usage = result
+            try:
+                with span("unpack"):
+                    outputs, missing = unpack_outputs(out, len(call_frame_urls[j]))
+            except ValueError as e:
+                print(f"Could not unpack the answer for {call_frame_urls[j]}: {e}")
+                self.counters[model_name]["packed_parse_failures"] += 1
+                for i in group:
+                    complete(i, None)
+                return
+            self.counters[model_name]["packed_missing_frames"] += missing
+
+            scene_usage = split_usage(usage[0] if usage else None, len(group))
+            offset = 0
+            for i in group:
+                num_frames = len(scene_frame_urls[i])
+                texts = (model.postprocess_output(o) for o in outputs[offset : offset + num_frames])
+                text = " ".join(t for t in texts if t)
+                offset += num_frames
+                complete(
+                    i,
+                    (processing_time / len(group), text, scene_usage),
+                    frames_per_call=len(group),
+                    **extra,
+                )
+
+        self.describe_calls(model_name, call_frame_urls, self.packed_prompt, complete_call)
+
+    @staticmethod
+    def to_record(result: tuple, **extra) -> Dict:
+        processing_time, out, *usage = result
+        record = {"processing_time": processing_time, "model_output": out, **extra}
+        if usage and usage[0] is not None:
+            record["usage"] = usage[0]
+        return record
+
+    async def describe_concurrently(
+        self,
+        model: Any,
+        scene_frame_urls: List[List[str]],
+        prompt: str,
+        complete: Callable[..., None],
+    ) -> None:
+        """
+        Describe all scenes with at most max_in_flight[model.provider] requests in flight
+        to the provider, counting those of other models running concurrently, calling
+        complete(i, result) as each request finishes. processing_time stays the
+        latency of each request.
+        """
+        limiter = self.get_limiter(model.provider)
+
+        async def describe(i, frame_urls):
+            async with limiter:
+                try:
+                    with span("scene"):
+                        result = await model.describe_async(frame_urls, prompt)
+                except Exception as e:
+                    print(f"Scene description failed for {frame_urls}: {e}")
+                    result = None
+            complete(i, result)
+
+        await asyncio.gather(
+            *(describe(i, frame_urls) for i, frame_urls in enumerate(scene_frame_urls))
+        )
 
     def num_frames_per_call(self) -> int:
         """Number of frames to process per API call"""
-        self.num_frames = 1
+        self.num_frames = self.frames_per_call
+        return self.num_frames
 
     def evaluate(
         self, video_predictions: Dict = None, video_ground_truth: Dict = None
     ) -> Dict:
-        def preprocess_text(text):
-            # Remove any surrounding quotes
-            text = text.strip('"')
-            # Remove newlines and extra whitespace
-            text = re.sub(r"\s+", " ", text)
-            return text.strip()
-
-        def calculate_character_error_rate(ground_truth, ocr_text):
-            """
-            Calculate the Character Error Rate (CER) between ground truth and OCR text.
-
-            CER = (S + D + I) / N
-            where:
-            S is the number of substitutions,
-            D is the number of deletions,
-            I is the number of insertions,
-            N is the number of characters in the ground truth.
-            """
-            distance = Levenshtein.distance(ground_truth, ocr_text)
-            return distance / len(ground_truth) if ground_truth else 1.0
-
-        def calculate_word_error_rate(ground_truth, ocr_text):
-            """
-            Calculate the Word Error Rate (WER) between ground truth and OCR text.
-
-            WER = (S + D + I) / N
-            where:
-            S is the number of substituted words,
-            D is the number of deleted words,
-            I is the number of inserted words,
-            N is the number of words in the ground truth.
-            """
-
-            ground_truth_words = ground_truth.split()
-            ocr_words = ocr_text.split()
-            distance = Levenshtein.distance(ground_truth_words, ocr_words)
-            return distance / len(ground_truth_words) if ground_truth_words else 1.0
-
-        def calculate_accuracy(ground_truth, ocr_text):
-            """
-            Calculate the accuracy of the OCR text compared to the ground truth.
-
-            Accuracy = (1 - CER) * 100
-            """
-            cer = calculate_character_error_rate(ground_truth, ocr_text)
-            return (1 - cer) * 100
-
-        def calculate_order_agnostic_accuracy(ground_truth, ocr_text):
-            """
-            Calculate order-agnostic word accuracy between ground truth and OCR text.
-
-            Word Accuracy = (Number of correct words) / (Total words in ground truth)
-
-            Args:
-                ground_truth (str): The ground truth text
-                ocr_text (str): The OCR output text
-
-            Returns:
-                float: Word accuracy score between 0 and 100
-            """
-
-            if not ground_truth:
-                return 0.0
-
-            # optmizing the search
-            ground_truth_set = set(ground_truth)
-
-            ground_truth_freq = Counter(ground_truth)
-            ocr_freq = Counter(ocr_text)
-
-            # Count matching words
-            matching_words = sum(
-                min(ground_truth_freq[word], ocr_freq[word])
-                for word in ground_truth_freq
-            )
-
-            accuracy = matching_words / len(ground_truth)
-
-            return accuracy * 100
+        matched = align_scenes(
+            video_predictions, video_ground_truth, self.match_tolerance
+        ).matched
+        return self.score_matched(matched)
+
+    def score_matched(self, matched: List[tuple]) -> List[Dict]:
+        """Evaluation results of (prediction, ground truth) pairs, in the order given."""
+        scores = self.metrics.score(
+            [scene_ground_truth["ocr_text"] for _, scene_ground_truth in matched],
+            [scene_pred["model_output"] for scene_pred, _ in matched],
+        )
 
         results = []
-        for scene_pred, scene_ground_truth in zip(
-            video_predictions, video_ground_truth
-        ):
-            # import pdb
-            # pdb.set_trace()
-            if (
-                scene_pred["scene_start_time"] == scene_ground_truth["start"]
-                and scene_pred["scene_end_time"] == scene_ground_truth["end"]
-            ):
-                model_output = preprocess_text(scene_pred["model_output"])
-                ground_truth = preprocess_text(scene_ground_truth["ocr_text"])
-
-                cer = calculate_character_error_rate(ground_truth, model_output)
-                wer = calculate_word_error_rate(ground_truth, model_output)
-                accuracy = calculate_accuracy(ground_truth, model_output)
-                order_agnostic_accuray = calculate_order_agnostic_accuracy(
-                    ground_truth, model_output
-                )
-
-                results.append(
-                    {
-                        "video_id": scene_pred["video_id"],
-                        "scene_start": scene_pred["scene_start_time"],
-                        "Scene_end": scene_pred["scene_end_time"],
-                        "image": scene_pred["image"],
-                        "ground_truth": ground_truth,
-                        "ocr": model_output,
-                        "cer": cer,
-                        "wer": wer,
-                        "accuracy": accuracy,
-                        "order_agnostic_accuray": order_agnostic_accuray,
-                        "processing_time": scene_pred["processing_time"],
-                    }
-                )
+        for i, (scene_pred, _) in enumerate(matched):
+            usage = scene_pred.get("usage") or {}
+            results.append(
+                {
+                    "video_id": scene_pred["video_id"],
+                    "scene_start": scene_pred["scene_start_time"],
+                    "Scene_end": scene_pred["scene_end_time"],
+                    "image": scene_pred["image"],
+                    "ground_truth": scores["ground_truth"][i],
+                    "ocr": scores["ocr"][i],
+                    "cer": float(scores["cer"][i]),
+                    "wer": float(scores["wer"][i]),
+                    "accuracy": float(scores["accuracy"][i]),
+                    "order_agnostic_accuray": float(scores["order_agnostic_accuracy"][i]),
+                    "processing_time": scene_pred["processing_time"],
+                    "input_tokens": usage.get("input_tokens"),
+                    "output_tokens": usage.get("output_tokens"),
+                    "payload_bytes": usage.get("payload_bytes"),
+                    "reprocessed_fraction": usage.get("reprocessed_fraction"),
+                    # whether the model read this frame, rather than reusing the output of an earlier one
+                    "described": not scene_pred.get("reused", False),
+                }
+            )
 
         return results
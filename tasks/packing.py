@@ -0,0 +1,55 @@
+import json
+import re
+from typing import List
+
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def unpack_outputs(text: str, num_images: int) -> tuple[List[str], int]:
+    """
+    Split the answer to a multi-image request into per-image texts.
+
+    The model is asked for a JSON object keyed by image index ("0", "1", ...).
+    Code fences and text around the object are ignored.
+
+    Args:
+        text (str): Model output.
+        num_images (int): Number of images sent in the request.
+
+    Returns:
+        tuple[List[str], int]: Text of every image (empty when the model left it out)
+            and the number of images missing from the answer.
+
+    Raises:
+        ValueError: The output holds no JSON object.
+    """
+    text = _CODE_FENCE.sub("", text.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError(f"No JSON object in the model output: {text[:200]!r}")
+    try:
+        answers = json.loads(text[start : end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in the model output: {e}") from e
+    if not isinstance(answers, dict):
+        raise ValueError("The model output is not a JSON object")
+
+    outputs = []
+    missing = 0
+    for i in range(num_images):
+        answer = answers.get(str(i))
+        if answer is None:
+            missing += 1
+            answer = ""
+        elif isinstance(answer, list):
+            answer = " ".join(map(str, answer))
+        outputs.append(str(answer))
+    return outputs, missing
+
+
+def split_usage(usage: dict | None, parts: int) -> dict | None:
+    """Share the usage of a request evenly between the scenes packed into it."""
+    if usage is None:
+        return None
+    return {key: value / parts for key, value in usage.items() if value is not None}
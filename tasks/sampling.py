@@ -0,0 +1,80 @@
+from typing import Callable, List
+
+import numpy as np
+from PIL import Image
+
+
+class AdaptiveSampler:
+    """
+    Picks the scenes of a video worth reading from its 1-second scenes.
+
+    A scene is sampled when its frames changed visibly since the last sampled scene
+    (the share of changed pixels of a grayscale thumbnail reaches change_threshold, low
+    enough for a changed word or ticker value to count) or when max_gap seconds passed
+    since it. Every other scene holds the output of the last sampled scene, so each
+    1-second scene still gets an output to be scored against its ground truth.
+
+    Like deduplication, scenes are compared with the last sampled scene rather than the
+    previous one, so slow changes cannot accumulate across the scenes in between.
+    """
+
+    def __init__(
+        self,
+        load_image: Callable[[str], Image.Image],
+        change_threshold: float = 0.0005,
+        max_gap: float = 10.0,
+        pixel_threshold: int = 24,
+        thumbnail_width: int = 320,
+    ):
+        """
+        Args:
+            load_image (Callable): Loads a frame URL into a PIL image.
+            change_threshold (float): Share of changed thumbnail pixels from which a scene is sampled.
+            max_gap (float): Seconds after which a scene is sampled even without a change, None never forces one.
+            pixel_threshold (int): Grayscale difference above which a thumbnail pixel counts as changed.
+            thumbnail_width (int): Width frames are downscaled to before comparing them.
+        """
+        self.load_image = load_image
+        self.change_threshold = change_threshold
+        self.max_gap = max_gap
+        self.pixel_threshold = pixel_threshold
+        self.thumbnail_width = thumbnail_width
+
+    def thumbnail(self, frame_url: str) -> np.ndarray:
+        image = self.load_image(frame_url).convert("L")
+        height = max(1, round(image.height * self.thumbnail_width / image.width))
+        thumbnail = image.resize((self.thumbnail_width, height), Image.Resampling.BOX)
+        return np.asarray(thumbnail, dtype=np.int16)
+
+    def change(self, a: List[np.ndarray], b: List[np.ndarray]) -> float:
+        """Largest share of changed pixels between the thumbnails of two scenes' frames, 1.0 if they cannot be compared."""
+        if len(a) != len(b) or any(x.shape != y.shape for x, y in zip(a, b)):
+            return 1.0
+        return max(
+            (float(np.mean(np.abs(x - y) > self.pixel_threshold)) for x, y in zip(a, b)),
+            default=0.0,
+        )
+
+    def plan(self, scene_frame_urls: List[List[str]], scene_starts: List[float]) -> List[int]:
+        """
+        Returns:
+            List[int]: For every scene, the index of the sampled scene whose output it uses (itself if it is sampled).
+        """
+        sources = []
+        sample_thumbnails = None
+        sample_start = None
+
+        for i, frame_urls in enumerate(scene_frame_urls):
+            thumbnails = [self.thumbnail(url) for url in frame_urls]
+            if (
+                sample_thumbnails is not None
+                and (self.max_gap is None or float(scene_starts[i]) - sample_start < self.max_gap)
+                and self.change(thumbnails, sample_thumbnails) < self.change_threshold
+            ):
+                sources.append(sources[-1])
+            else:
+                sources.append(i)
+                sample_thumbnails = thumbnails
+                sample_start = float(scene_starts[i])
+
+        return sources
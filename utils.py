@@ -1,42 +1,24 @@
+import copy
+import csv
 import os
-from typing import List
+import re
+from typing import Callable, List
 import logging
 import json
 
+from models.registry import MODEL_REGISTRY
+from models.tracing import LatencyHistogram
+
 def create_directories(args) -> List[str]:
     """
     Create directories for storing model results based on the selected models.
     
     Args:
-        args: Arguments containing model selection and base directory paths
+        args: Arguments containing model selection and the <group>_results_dir base directory of every model group
     
     Returns:
         List[str]: List of full directory paths that were created or processed
     """
-    # Define model groups
-    model_groups = {
-        'openai': {
-            'base_dir': args.openai_results_dir,
-            'models': ['gpt-4o', 'gpt-4o-mini', 'chatgpt-4o-latest', 'gpt-4-turbo']
-        },
-        'anthropic': {
-            'base_dir': args.anthropic_results_dir,
-            'models': ['claude-3-5-sonnet-latest']
-        },
-        'google': {
-            'base_dir': args.google_results_dir,
-            'models': ['gemini-1.5-flash', 'gemini-1.5-flash-8b', "gemini-1.5-pro"]
-        },
-    }
-    
-    
-    model_groups.update({
-        'ocr': {
-            'base_dir': args.ocr_results_dir,
-            'models': ['rapidocr', 'easyocr']
-        }
-    })
-    
     processed_paths = []
     
     def create_model_dir(base_dir: str, model: str) -> None:
@@ -52,47 +34,18 @@ def create_directories(args) -> List[str]:
         else:
             print(f"Directory already exists: {model_dir}")
         processed_paths.append(model_dir)
-    
-    def process_model(model_name: str) -> bool:
-        """Process a single model or group name, return True if found"""
-        # Check if it's "all"
-        if model_name.lower() == "all":
-            for group in model_groups.values():
-                for model in group['models']:
-                    create_model_dir(group['base_dir'], model)
-            return True
-        
-         # Check if it's "benchmark"
-        if model_name.lower() == "benchmark":
-            for group in model_groups.values():
-                for model in group['models']:
-                    if model in ["gpt-4o","gemini-1.5-pro", "claude-3-5-sonnet-latest", "easyocr", "rapidocr"]:
-                        create_model_dir(group['base_dir'], model)
-            return True
-            
 
-        # Check if it's a group name
-        if model_name.lower() in model_groups:
-            group_info = model_groups[model_name.lower()]
-            for model in group_info['models']:
-                create_model_dir(group_info['base_dir'], model)
-            return True
-            
-        # Check if it's a specific model name
-        for group_info in model_groups.values():
-            if model_name.lower() in [m.lower() for m in group_info['models']]:
-                create_model_dir(group_info['base_dir'], model_name)
-                return True
-                
-        return False
-
-    # Handle single model or list of models
+    # Handle single model or list of models, each a model name, a group name, "all" or "benchmark"
     selected_models = args.model if isinstance(args.model, list) else [args.model]
     
-    for model in selected_models:
-        if not process_model(model):
-            print(f"Warning: No matching model or group found for '{model}'")
+    for selection in selected_models:
+        model_names = MODEL_REGISTRY.resolve(selection)
+        if not model_names:
+            print(f"Warning: No matching model or group found for '{selection}'")
             continue
+        for model_name in model_names:
+            group = MODEL_REGISTRY.get(model_name).group
+            create_model_dir(getattr(args, f"{group}_results_dir"), model_name)
     
     if not processed_paths:
         print("No valid models were processed")
@@ -101,9 +54,10 @@ def create_directories(args) -> List[str]:
     
     return processed_paths
 
-def setup_logging(path: str, current_run: str) -> logging.Logger:
+def setup_logging(path: str, current_run: str, resume: bool = False) -> logging.Logger:
     """
     Set up logging for each model directory with separate loggers.
+    When resuming a run, the existing logfile is appended to.
     """
     model_name = os.path.basename(path)
     current_run_dir = os.path.join(path, current_run)
@@ -118,7 +72,7 @@ def setup_logging(path: str, current_run: str) -> logging.Logger:
             logger.removeHandler(handler)
             
     logfile = os.path.join(current_run_dir, "logfile.log")
-    fh = logging.FileHandler(logfile, "w")
+    fh = logging.FileHandler(logfile, "a" if resume else "w")
     ch = logging.StreamHandler()
     
     formatter = logging.Formatter("%(asctime)s %(message)s")
@@ -132,58 +86,365 @@ def setup_logging(path: str, current_run: str) -> logging.Logger:
         
         
         
-def save_summary(current_run):
+def update_run_stats(current_run_dir: str, **stats) -> dict:
+    """
+    Merge run level statistics (warm-up time, throughput, ...) into run_stats.json of a model run.
+
+    Args:
+        current_run_dir: Directory of the model run
+        **stats: Statistics to add or overwrite
+
+    Returns:
+        dict: The merged statistics
+    """
+    stats_file = os.path.join(current_run_dir, "run_stats.json")
+    run_stats = load_run_stats(current_run_dir)
+    run_stats.update(stats)
+    with open(stats_file, "w") as f:
+        json.dump(run_stats, f)
+    return run_stats
+
+
+def load_run_stats(current_run_dir: str) -> dict:
+    stats_file = os.path.join(current_run_dir, "run_stats.json")
+    if not os.path.exists(stats_file):
+        return {}
+    with open(stats_file, "r") as f:
+        return json.load(f)
+
+
+def cost_per_1k_frames(model_summary: dict, pricing: dict) -> float | None:
+    """
+    Estimated USD per 1,000 scored frames from the total token usage, None without a price.
+
+    Frames reusing an earlier output (deduplication, adaptive sampling) have no usage of
+    their own and count as free, so reuse lowers the cost per frame.
+    """
+    price = pricing.get(model_summary["model"])
+    if price is None:
+        return None
+    if model_summary["total_input_tokens"] is None and model_summary["total_output_tokens"] is None:
+        # no usage recorded (e.g. outputs from before token accounting), only free models have a known cost
+        return 0.0 if not (price["input"] or price["output"]) else None
+    if not model_summary["total_frames"]:
+        return None
+    return 1000 * (
+        (model_summary["total_input_tokens"] or 0) * price["input"]
+        + (model_summary["total_output_tokens"] or 0) * price["output"]
+    ) / 1e6 / model_summary["total_frames"]
+
+
+def pareto_front(summary: list) -> list:
+    """
+    Models no other model beats on accuracy, cost and throughput at once.
+
+    Args:
+        summary: Model summaries with avg_acc, cost_per_1k_frames and frames_per_sec
+
+    Returns:
+        list: The non-dominated model summaries, most accurate first
+    """
+    candidates = [
+        model_summary for model_summary in summary if model_summary["cost_per_1k_frames"] is not None
+    ]
+
+    def dominates(a, b):
+        at_least_as_good = (
+            a["avg_acc"] >= b["avg_acc"]
+            and a["cost_per_1k_frames"] <= b["cost_per_1k_frames"]
+            and a["frames_per_sec"] >= b["frames_per_sec"]
+        )
+        better = (
+            a["avg_acc"] > b["avg_acc"]
+            or a["cost_per_1k_frames"] < b["cost_per_1k_frames"]
+            or a["frames_per_sec"] > b["frames_per_sec"]
+        )
+        return at_least_as_good and better
+
+    front = [
+        b for b in candidates if not any(dominates(a, b) for a in candidates if a is not b)
+    ]
+    return sorted(front, key=lambda model_summary: model_summary["avg_acc"], reverse=True)
+
+
+def _stage_time_per_frame(histograms: dict, stage: str, total_frames: int) -> float:
+    histogram = histograms.get(stage)
+    if histogram is None or not total_frames:
+        return 0.0
+    return histogram.total / total_frames
+
+
+def _incremental_speedup(histograms: dict) -> float | None:
+    """
+    Estimated speedup of incremental OCR: mean time of a whole-frame read over the mean
+    inference time of all frames, None for runs without incremental OCR.
+    """
+    full_frame = histograms.get("ocr_full_frame")
+    inference = histograms.get("inference")
+    if full_frame is None or inference is None or not full_frame.count or not inference.total:
+        return None
+    return (full_frame.total / full_frame.count) / (inference.total / inference.count)
+
+
+def video_categories(video_ids: dict) -> dict:
+    """
+    Category of every video, its name without the trailing number (CNBC_04 -> CNBC).
+
+    Args:
+        video_ids: Video ids keyed by video name, as in config.VIDEO_IDS
+
+    Returns:
+        dict: Category keyed by video id
+    """
+    return {video_id: re.sub(r"_\d+$", "", name) for name, video_id in video_ids.items()}
+
+
+def category_breakdown(videos: list, categories: dict) -> list:
+    """
+    Frames read by the model against accuracy per model and video category.
+
+    Args:
+        videos: Per-video breakdown of ResultsStore.video_breakdown
+        categories: Category keyed by video id, videos missing from it are their own category
+
+    Returns:
+        list: Frame weighted averages per model and category
+    """
+    grouped = {}
+    for video in videos:
+        key = (video["model"], categories.get(video["video_id"], video["video_id"]))
+        grouped.setdefault(key, []).append(video)
+
+    breakdown = []
+    for (model, category), category_videos in sorted(grouped.items()):
+        total_frames = sum(video["total_frames"] for video in category_videos)
+        # runs stored before frames were flagged as read have no count
+        described = [video["frames_described"] for video in category_videos]
+        frames_described = None if None in described else sum(described)
+        breakdown.append(
+            {
+                "model": model,
+                "category": category,
+                "total_vids": len(category_videos),
+                "total_frames": total_frames,
+                "frames_described": frames_described,
+                "described_fraction": (
+                    frames_described / total_frames
+                    if frames_described is not None and total_frames
+                    else None
+                ),
+                "avg_acc": sum(video["avg_acc"] * video["total_frames"] for video in category_videos) / total_frames,
+                "avg_cer": sum(video["avg_cer"] * video["total_frames"] for video in category_videos) / total_frames,
+            }
+        )
+    return breakdown
+
+
+def category_chart(breakdown: list, width: int = 20) -> str:
+    """Text chart of the share of frames read and the accuracy of every category, one block per model."""
+
+    def bar(fraction):
+        filled = round(max(0.0, min(1.0, fraction)) * width)
+        return "#" * filled + "." * (width - filled)
+
+    lines = []
+    for model in dict.fromkeys(row["model"] for row in breakdown):
+        lines.append(model)
+        lines.append(f"  {'category':<28} {'frames read':<{width + 16}} accuracy")
+        for row in breakdown:
+            if row["model"] != model:
+                continue
+            if row["described_fraction"] is None:
+                frames = f"{'n/a':<{width + 16}}"
+            else:
+                frames = (
+                    f"{bar(row['described_fraction'])} {row['described_fraction']:>4.0%} "
+                    f"{row['frames_described']:>4}/{row['total_frames']:<4}"
+                )
+            # accuracy is a percentage
+            lines.append(f"  {row['category']:<28} {frames} {bar(row['avg_acc'] / 100)} {row['avg_acc']:.1f}%")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def save_summary(store, current_run, reference_run=None, pricing=None, categories=None):
+    """
+    Write the evaluation summary of a run to evaluation_summary/<current_run>.json
+    and its per-video breakdown to evaluation_summary/<current_run>_videos.json.
+    Both include p50/p95/p99 of every traced stage. The speed-cost-accuracy
+    Pareto front of the models goes to evaluation_summary/<current_run>_pareto.json,
+    and the frames read against accuracy per video category to
+    evaluation_summary/<current_run>_categories.json, charted in _categories.txt.
+
+    Args:
+        store: ResultsStore holding the evaluations and run_stats
+        current_run: Run to summarize
+        reference_run: Optional full run to compare against, adds the accuracy/CER delta per model
+        pricing: USD per 1M input/output tokens per model, for the cost estimate
+        categories: Category keyed by video id, see video_categories
+    """
     os.makedirs("evaluation_summary",exist_ok=True)
     summary = []
-    
-    for model_result in os.listdir("ocr_results"):
-        for model in os.listdir(os.path.join("ocr_results",model_result)):
-            cer = 0
-            wer = 0
-            acc = 0
-            order_agnostic_acc = 0
-            total_frames = 0
-            total_vids = 0
-        
-            for run in os.listdir(os.path.join("ocr_results",model_result, model)):
-                
-                if current_run in run:
-                    for evals in os.listdir(os.path.join("ocr_results",model_result, model,run,"evaluations")):
-                        total_vids+=1
-                        
-                        json_path = os.path.join("ocr_results",model_result, model,run,"evaluations",evals)
-                        
-                        with open(json_path,"r") as f:
-                            json_data = json.load(f)
-                            
-                        for entry in json_data:
-                            cer+=entry["cer"]
-                            wer+=entry["wer"]
-                            acc+=entry["accuracy"]
-                            order_agnostic_acc+=entry["order_agnostic_accuray"]
-                            total_frames+=1
-                            
-            if total_vids!=0:
-                summary.append(
+
+    all_run_stats = store.get_run_stats(current_run)
+    comparison = store.compare(current_run, reference_run) if reference_run else {}
+
+    # stage latency histograms per (model, video), merged per model
+    video_latency = store.get_latency(current_run)
+    model_latency = {}
+    for (model, _), histograms in video_latency.items():
+        merged = model_latency.setdefault(model, {})
+        for stage, histogram in histograms.items():
+            merged.setdefault(stage, LatencyHistogram()).merge(histogram)
+
+    # per frame latency (processing_time) distribution per model
+    processing_times = {}
+    for model, times in store.processing_times(current_run).items():
+        processing_times[model] = LatencyHistogram()
+        for processing_time in times:
+            processing_times[model].record(processing_time)
+
+    for totals in store.summary(current_run):
+        model = totals["model"]
+        run_stats = all_run_stats.get(model, {})
+
+        latency = processing_times[model]
+        stage_latency = model_latency.get(model, {})
+        model_summary = {
+            **totals,
+            "p50_processing_time" : latency.percentile(50),
+            "p95_processing_time" : latency.percentile(95),
+            "p99_processing_time" : latency.percentile(99),
+            # network time per frame, kept out of processing_time; download_wait is the part
+            # of it the inference loop still blocked on with prefetching
+            "avg_download_time" : _stage_time_per_frame(stage_latency, "download", totals["total_frames"]),
+            "avg_download_wait" : _stage_time_per_frame(stage_latency, "download_wait", totals["total_frames"]),
+            "frames_per_sec" : run_stats.get("frames_per_sec", 0.0),
+            "workers" : run_stats.get("workers", 1),
+            "batch_size" : run_stats.get("batch_size", 1),
+            "frames_per_call" : run_stats.get("frames_per_call", 1),
+            "warmup_time" : run_stats.get("warmup_time", 0.0),
+            "dedup_threshold" : run_stats.get("dedup_threshold"),
+            "dedup_calls_saved" : run_stats.get("dedup_calls_saved", 0),
+            "adaptive_sampling" : run_stats.get("adaptive_sampling"),
+            "sampling_calls_saved" : run_stats.get("sampling_calls_saved", 0),
+            "cache_mode" : run_stats.get("cache_mode", "off"),
+            "response_cache_hits" : run_stats.get("response_cache_hits", 0),
+            "image_preprocessing" : run_stats.get("image_preprocessing"),
+            "onnx_session" : run_stats.get("onnx_session"),
+            "incremental_ocr" : run_stats.get("incremental_ocr"),
+            "incremental_speedup" : _incremental_speedup(stage_latency),
+            "unmatched_predictions" : run_stats.get("unmatched_predictions", 0),
+            "unmatched_ground_truth" : run_stats.get("unmatched_ground_truth", 0),
+            "latency" : {
+                stage : histogram.summary()
+                for stage, histogram in sorted(stage_latency.items())
+            },
+        }
+
+        model_summary["cost_per_1k_frames"] = cost_per_1k_frames(model_summary, pricing or {})
+
+        if model in comparison:
+            model_summary["reference_run"] = reference_run
+            model_summary["acc_delta"] = comparison[model]["acc_delta"]
+            model_summary["cer_delta"] = comparison[model]["cer_delta"]
+
+        summary.append(model_summary)
+
+    with open(os.path.join("evaluation_summary",f"{current_run}.json"), "w") as f:
+        json.dump(summary,f)
+
+    pareto_columns = (
+        "model",
+        "avg_acc",
+        "avg_cer",
+        "frames_per_sec",
+        "avg_processing_time",
+        "p95_processing_time",
+        "avg_input_tokens",
+        "avg_output_tokens",
+        "cost_per_1k_frames",
+    )
+    with open(os.path.join("evaluation_summary",f"{current_run}_pareto.json"), "w") as f:
+        json.dump(
+            [
+                {column : model_summary[column] for column in pareto_columns}
+                for model_summary in pareto_front(summary)
+            ],
+            f,
+        )
+
+    videos = store.video_breakdown(current_run)
+    for video in videos:
+        video["latency"] = {
+            stage : histogram.summary()
+            for stage, histogram in sorted(
+                video_latency.get((video["model"], video["video_id"]), {}).items()
+            )
+        }
+
+    with open(os.path.join("evaluation_summary",f"{current_run}_videos.json"), "w") as f:
+        json.dump(videos,f)
+
+    categories_breakdown = category_breakdown(videos, categories or {})
+    with open(os.path.join("evaluation_summary",f"{current_run}_categories.json"), "w") as f:
+        json.dump(categories_breakdown,f)
+    with open(os.path.join("evaluation_summary",f"{current_run}_categories.txt"), "w") as f:
+        f.write(category_chart(categories_breakdown))
+
+
+def run_sweep(run_main: Callable, args, variants: list, columns: tuple) -> list:
+    """
+    Run the harness once per variant and collect one row per model of every run's summary.
+
+    Args:
+        run_main (Callable): run.main.
+        args: Parsed run.py arguments every variant starts from.
+        variants (list): (run_name, overrides, fields) per variant: the run is named run_name,
+            overrides are set on a copy of args and fields are added to every row of the run.
+        columns (tuple): Summary fields kept in the rows.
+
+    Returns:
+        list: Rows of the runs that wrote a summary, in variant order.
+    """
+    rows = []
+    for run_name, overrides, fields in variants:
+        run_args = copy.copy(args)
+        for key, value in overrides.items():
+            setattr(run_args, key, value)
+        run_args.run_name = run_name
+        run_args.resume = None
+        run_main(run_args)
+
+        summary_file = os.path.join("evaluation_summary", f"{run_name}.json")
+        if not os.path.exists(summary_file):
+            print(f"No summary for {run_name}, skipping it")
+            continue
+        with open(summary_file, "r") as f:
+            for model_summary in json.load(f):
+                rows.append(
                     {
-                        "model" : model,
-                        "total_vids" : total_vids,
-                        "total_frames" : total_frames,
-                        "avg_cer" : cer/total_frames,
-                        "avg_wer" : wer/total_frames,
-                        "avg_acc" : acc/total_frames,
-                        "avg_order_agnostic_acc" : order_agnostic_acc/total_frames                    
-                        
+                        **{column: model_summary.get(column) for column in columns},
+                        **fields,
+                        "run": run_name,
                     }
                 )
-            
-    with open(os.path.join("evaluation_summary",f"{current_run}.json"), "w") as f:
-        
-        json.dump(summary,f)
-            
-        
-                            
-                                
-                            
-        
-    
\ No newline at end of file
+    return rows
+
+
+def write_sweep_report(rows: list, report_name: str, columns: tuple) -> str:
+    """
+    Write the rows of a sweep to evaluation_summary/<report_name>.json and .csv.
+
+    Returns:
+        str: Path of the report without extension.
+    """
+    os.makedirs("evaluation_summary", exist_ok=True)
+    report_file = os.path.join("evaluation_summary", report_name)
+    with open(f"{report_file}.json", "w") as f:
+        json.dump(rows, f)
+    with open(f"{report_file}.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return report_file